@@ -0,0 +1,76 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .resume import aget_resume
+from .serializers import EducationSerializer, ExperienceSerializer, ProjectSerializer, represent_rows
+from .throttling import client_ident, take_token
+
+
+def _authenticate(request):
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    return Request(request, authenticators=authenticators).user
+
+
+async def authenticated_user(request):
+    """
+    Run the configured DRF authenticators for a plain Django request.
+
+    Returns ``(user, None)`` on success and ``(None, response)`` with the
+    401, or the 429 once the user's read budget is spent, otherwise.
+    """
+    try:
+        user = await sync_to_async(_authenticate)(request)
+    except exceptions.APIException as exc:
+        return None, JsonResponse({'detail': str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if not user or not user.is_authenticated:
+        detail = exceptions.NotAuthenticated.default_detail
+        return None, JsonResponse({'detail': str(detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    wait = await sync_to_async(take_token)('read', client_ident(request, user))
+    if wait is not None:
+        throttled = exceptions.Throttled(wait)
+        response = JsonResponse({'detail': str(throttled.detail)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(math.ceil(wait))
+        return None, response
+    return user, None
+
+
+@require_GET
+async def complete_resume(request):
+    """
+    Get complete resume data, querying the sections concurrently
+    """
+    user, error = await authenticated_user(request)
+    if error:
+        return error
+    data, etag = await aget_resume(user)
+    response = get_conditional_response(request, etag=etag) or JsonResponse(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def section_list_view(serializer_class):
+    model = serializer_class.Meta.model
+
+    @require_GET
+    async def section_list(request):
+        user, error = await authenticated_user(request)
+        if error:
+            return error
+        rows = model.objects.filter(user=user).values(*serializer_class.Meta.fields)
+        return JsonResponse(represent_rows(serializer_class, [row async for row in rows]), safe=False)
+
+    section_list.__doc__ = f'List the {model._meta.verbose_name_plural} of the user'
+    return section_list
+
+
+experience_list = section_list_view(ExperienceSerializer)
+education_list = section_list_view(EducationSerializer)
+project_list = section_list_view(ProjectSerializer)
@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+USER_STATE_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def _state_key(user_id):
+    return f'jwt:{user_id}:state'
+
+
+def _revoked_key(user_id):
+    return f'jwt:{user_id}:revoked_before'
+
+
+def forget_user_state(user_id):
+    cache.delete(_state_key(user_id))
+
+
+def revoke_user_tokens(user_id):
+    """
+    Reject every token of ``user_id`` issued up to now and forget its cached
+    state. Only enforced while ``JWT_USER_CACHE_TTL`` is enabled.
+    """
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(_revoked_key(user_id), time.time(), timeout=int(lifetime) + 1)
+    forget_user_state(user_id)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the signed user id claim instead of loading
+    the user row on every request.
+
+    ``request.user`` is an unsaved user instance carrying only the primary key,
+    which is all the views need to filter and assign rows. With
+    ``JWT_USER_CACHE_TTL`` set, ``is_active``, the staff flags and token
+    revocation are checked against a per-user cache entry that is refreshed
+    from the database at most once per TTL.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # Claims are strings; cast so request.user.pk compares equal to row foreign keys
+        model = get_user_model()
+        try:
+            user_id = model._meta.get_field(api_settings.USER_ID_FIELD).to_python(user_id)
+        except ValidationError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        user = model(**{api_settings.USER_ID_FIELD: user_id})
+        if settings.JWT_USER_CACHE_TTL:
+            for field, value in self.get_user_state(user_id, validated_token).items():
+                setattr(user, field, value)
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def get_user_state(self, user_id, validated_token):
+        cached = cache.get_many([_state_key(user_id), _revoked_key(user_id)])
+
+        revoked_before = cached.get(_revoked_key(user_id))
+        if revoked_before is not None and validated_token.get('iat', 0) <= revoked_before:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        state = cached.get(_state_key(user_id))
+        if state is None:
+            state = (
+                get_user_model().objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values(*USER_STATE_FIELDS)
+                .first()
+            )
+            if state is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(_state_key(user_id), state, timeout=settings.JWT_USER_CACHE_TTL)
+        return state
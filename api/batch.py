@@ -0,0 +1,207 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .progress import is_complete, record_progress, record_progress_delta
+from .resume import RESUME_SECTIONS, SINGLETON_SECTIONS, invalidate_resume
+from .search import SEARCH_FIELDS, index_rows
+from .sync import record_deletions
+from .tags import TAG_FIELDS, sync_tags
+
+
+class SectionBatchSerializer(serializers.Serializer):
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, attrs):
+        max_items = self.context.get('max_items')
+        if max_items and sum(len(items) for items in attrs.values()) > max_items:
+            raise serializers.ValidationError(f'A batch may contain at most {max_items} operations.')
+
+        update_ids = []
+        for item in attrs['update']:
+            if not isinstance(item.get('id'), int):
+                raise serializers.ValidationError({'update': 'Every update needs an integer "id".'})
+            update_ids.append(item['id'])
+        if len(set(update_ids)) != len(update_ids):
+            raise serializers.ValidationError({'update': 'Each id may only be updated once.'})
+        if len(set(attrs['delete'])) != len(attrs['delete']):
+            raise serializers.ValidationError({'delete': 'Each id may only be deleted once.'})
+        if set(update_ids) & set(attrs['delete']):
+            raise serializers.ValidationError('An id cannot be both updated and deleted.')
+        return attrs
+
+
+def validate_section_batch(user, serializer_class, batch):
+    """
+    Validate a section batch against the rows ``user`` owns.
+
+    Returns ``(creates, updates, deletes)``: validated data for new rows,
+    ``(instance, validated_data)`` pairs for updated rows and the instances
+    to delete. Rows are locked, so call this inside ``transaction.atomic``.
+    """
+    model = serializer_class.Meta.model
+    ids = [item['id'] for item in batch['update']] + list(batch['delete'])
+    existing = model.objects.select_for_update().filter(user=user, pk__in=ids).in_bulk()
+    missing = sorted(set(ids) - set(existing))
+    if missing:
+        raise serializers.ValidationError({'id': f'Unknown ids: {missing}'})
+
+    create_serializer = serializer_class(data=batch['create'], many=True)
+    create_serializer.is_valid(raise_exception=True)
+
+    updates = []
+    errors = []
+    for item in batch['update']:
+        instance = existing[item['id']]
+        update_serializer = serializer_class(instance, data=item, partial=True)
+        if update_serializer.is_valid():
+            updates.append((instance, update_serializer.validated_data))
+            errors.append({})
+        else:
+            errors.append(update_serializer.errors)
+    if any(errors):
+        raise serializers.ValidationError({'update': errors})
+
+    deletes = [existing[pk] for pk in batch['delete']]
+    return create_serializer.validated_data, updates, deletes
+
+
+def apply_section_batch(user, model, creates, updates, deletes):
+    """
+    Write a validated section batch with one bulk statement per operation.
+
+    ``bulk_create`` and ``bulk_update`` skip ``save()`` and its signals, so
+    the stored progress, tag links, search index and the resume cache are
+    maintained here. Deletes still send ``post_delete``.
+    """
+    delta = 0
+    now = timezone.now()
+
+    new_rows = [model(user=user, **data) for data in creates]
+    delta += sum(is_complete(row) for row in new_rows)
+    model.objects.bulk_create(new_rows)
+
+    fields = {'updated_at', 'version'}
+    for instance, data in updates:
+        delta -= is_complete(instance)
+        for field, value in data.items():
+            setattr(instance, field, value)
+        instance.updated_at = now
+        # Rows are locked by validate_section_batch
+        instance.version += 1
+        fields.update(data)
+        delta += is_complete(instance)
+    if updates:
+        model.objects.bulk_update([instance for instance, _ in updates], sorted(fields))
+
+    if deletes:
+        deletes = {instance.pk: instance for instance in deletes}
+        # Rows are locked by validate_section_batch, so only count and
+        # tombstone those still there, each once
+        pks = list(model.objects.filter(pk__in=deletes).values_list('pk', flat=True))
+        model.objects.filter(pk__in=pks).delete()
+        delta -= sum(is_complete(deletes[pk]) for pk in pks)
+        record_deletions(user, model, pks)
+
+    saved = new_rows + [instance for instance, _ in updates]
+    if model in TAG_FIELDS:
+        sync_tags(saved)
+    if model in SEARCH_FIELDS:
+        index_rows(saved)
+    record_progress_delta(user, model, delta)
+    invalidate_resume(user.pk)
+    return new_rows
+
+
+def run_section_batch(user, serializer_class, batch):
+    with transaction.atomic():
+        creates, updates, deletes = validate_section_batch(user, serializer_class, batch)
+        apply_section_batch(user, serializer_class.Meta.model, creates, updates, deletes)
+
+
+class ResumePatchSerializer(serializers.Serializer):
+    personal_info = serializers.DictField(required=False)
+    experiences = serializers.ListField(child=serializers.DictField(), required=False)
+    education = serializers.ListField(child=serializers.DictField(), required=False)
+    projects = serializers.ListField(child=serializers.DictField(), required=False)
+    skills = serializers.DictField(required=False)
+
+
+def _changes(instance, data):
+    return {field: value for field, value in data.items() if getattr(instance, field) != value}
+
+
+def diff_section(user, serializer_class, items, max_items=None):
+    """
+    Validate the desired rows of a list section as a batch against the
+    stored rows: items without ``id`` are created, items whose values
+    differ are updated and stored rows left out of ``items`` are deleted.
+    Call inside ``transaction.atomic``.
+    """
+    model = serializer_class.Meta.model
+    listed = {item.get('id') for item in items}
+    batch = SectionBatchSerializer(data={
+        # Listed newest first, so create the last item first
+        'create': [item for item in reversed(items) if 'id' not in item],
+        'update': [item for item in items if 'id' in item],
+        'delete': [pk for pk in model.objects.filter(user=user).values_list('pk', flat=True) if pk not in listed],
+    }, context={'max_items': max_items})
+    batch.is_valid(raise_exception=True)
+    creates, updates, deletes = validate_section_batch(user, serializer_class, batch.validated_data)
+    updates = [(instance, changes) for instance, data in updates if (changes := _changes(instance, data))]
+    return creates, updates, deletes
+
+
+def diff_singleton(user, serializer_class, data):
+    """
+    A saveable serializer for the changed fields of a one-per-user section,
+    or ``None`` when nothing changed. Call inside ``transaction.atomic``.
+    """
+    instance = serializer_class.Meta.model.objects.select_for_update().filter(user=user).first()
+    serializer = serializer_class(instance, data=data, partial=instance is not None)
+    serializer.is_valid(raise_exception=True)
+    if instance is not None and not _changes(instance, serializer.validated_data):
+        return None
+    return serializer
+
+
+def run_resume_patch(user, document, max_items=None):
+    """
+    Apply a full or partial resume document in one transaction, writing only
+    the rows that differ from the stored resume.
+
+    Sections missing from ``document`` are left alone. List sections are
+    replaced by the listed rows; one-per-user sections are updated field by
+    field. Every section is validated before anything is written.
+    """
+    with transaction.atomic():
+        plans = {}
+        errors = {}
+        for section, serializer_class in RESUME_SECTIONS.items():
+            if section not in document:
+                continue
+            try:
+                if section in SINGLETON_SECTIONS:
+                    plans[section] = diff_singleton(user, serializer_class, document[section])
+                else:
+                    plans[section] = diff_section(user, serializer_class, document[section], max_items)
+            except serializers.ValidationError as exc:
+                errors[section] = exc.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        for section, plan in plans.items():
+            model = RESUME_SECTIONS[section].Meta.model
+            if section in SINGLETON_SECTIONS:
+                if plan is not None:
+                    was_complete = is_complete(plan.instance)
+                    if plan.instance is None:
+                        instance = plan.save(user=user)
+                    else:
+                        # Locked by diff_singleton
+                        instance = plan.save(user=user, version=plan.instance.version + 1)
+                    record_progress(user, model, was_complete, is_complete(instance))
+            elif any(plan):
+                apply_section_batch(user, model, *plan)
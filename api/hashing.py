@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+# Upper bounds of the cumulative hash latency histogram, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many authentication requests, please retry shortly.'
+    default_code = 'hashing_unavailable'
+
+    def __init__(self, wait):
+        super().__init__()
+        # Sent as Retry-After by DRF's exception handler
+        self.wait = wait
+
+
+class HashingPool:
+    """
+    Size-limited executor for password hashing.
+
+    PBKDF2 releases the GIL, so a few hashing threads keep auth bursts from
+    occupying every request worker. At most ``workers + max_queue`` hashes
+    are admitted at a time; further calls fail fast with ``HashingUnavailable``.
+    """
+
+    def __init__(self, workers, max_queue, retry_after):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+
+    def _get_executor(self):
+        # Forked gunicorn workers do not inherit the executor threads
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+            self._pid = os.getpid()
+        return self._executor
+
+    def run(self, func, *args):
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HashingUnavailable(self.retry_after)
+            self.in_flight += 1
+            executor = self._get_executor()
+
+        start = time.perf_counter()
+        try:
+            return executor.submit(func, *args).result()
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.latency_sum += latency
+                for index, bound in enumerate(LATENCY_BUCKETS):
+                    if latency <= bound:
+                        self.latency_buckets[index] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'queue_depth': max(self.in_flight - self.workers, 0),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'latency_seconds_sum': self.latency_sum,
+                'latency_seconds_buckets': dict(zip(
+                    ['+Inf' if bound == float('inf') else str(bound) for bound in LATENCY_BUCKETS],
+                    self.latency_buckets,
+                )),
+            }
+
+
+pool = HashingPool(
+    workers=settings.PASSWORD_HASHING_WORKERS,
+    max_queue=settings.PASSWORD_HASHING_QUEUE,
+    retry_after=settings.PASSWORD_HASHING_RETRY_AFTER,
+)
+
+
+def make_password(password):
+    return pool.run(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    return pool.run(hashers.check_password, password, encoded)
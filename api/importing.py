@@ -0,0 +1,155 @@
+import json
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .models import PersonalInfo, Experience, Education, Project, Skill, ResumeProgress
+from .progress import PROGRESS_FIELDS, is_complete
+from .provisioning import EMPTY_ROWS
+from .search import SEARCH_FIELDS, index_rows
+from .serializers import (
+    PersonalInfoSerializer, ExperienceSerializer, EducationSerializer,
+    ProjectSerializer, SkillSerializer
+)
+from .tags import TAG_FIELDS, sync_tags
+
+
+class ImportedUserSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    password = serializers.CharField(required=False, write_only=True)
+
+
+class ImportedResumeSerializer(serializers.Serializer):
+    # Read-only fields (ids, timestamps) and the derived progress are ignored
+    personal_info = PersonalInfoSerializer(required=False, allow_null=True, default=None)
+    experiences = ExperienceSerializer(many=True, required=False, default=list)
+    education = EducationSerializer(many=True, required=False, default=list)
+    projects = ProjectSerializer(many=True, required=False, default=list)
+    skills = SkillSerializer(required=False, allow_null=True, default=None)
+
+
+class ImportedLineSerializer(serializers.Serializer):
+    """
+    One JSONL line: the user to create and their resume in the
+    ``CompleteResumeSerializer`` shape, as written by ``export_resumes``.
+    """
+    user = ImportedUserSerializer()
+    resume = ImportedResumeSerializer()
+
+
+def validate_lines(lines):
+    """
+    Parse and validate ``(line_number, text)`` pairs.
+
+    Returns ``(valid, errors)``: ``(line_number, validated_data)`` pairs and
+    ``(line_number, errors)`` pairs. Usernames taken in the database or
+    repeated within ``lines`` are rejected with a single query.
+    """
+    valid = []
+    errors = []
+    for line_number, text in lines:
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            errors.append((line_number, {'line': [f'Invalid JSON: {exc}']}))
+            continue
+        serializer = ImportedLineSerializer(data=data)
+        if serializer.is_valid():
+            user = serializer.validated_data['user']
+            user['username'] = User.normalize_username(user['username'])
+            valid.append((line_number, serializer.validated_data))
+        else:
+            errors.append((line_number, serializer.errors))
+
+    usernames = Counter(data['user']['username'] for _, data in valid)
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    taken.update(username for username, count in usernames.items() if count > 1)
+    if taken:
+        errors.extend(
+            (line_number, {'user': {'username': ['A user with that username already exists.']}})
+            for line_number, data in valid if data['user']['username'] in taken
+        )
+        valid = [(line_number, data) for line_number, data in valid if data['user']['username'] not in taken]
+    return valid, errors
+
+
+SECTION_MODELS = (
+    ('personal_info', PersonalInfo),
+    ('experiences', Experience),
+    ('education', Education),
+    ('projects', Project),
+    ('skills', Skill),
+)
+
+
+def insert_resumes(resumes):
+    """
+    Create the users and resume rows of validated lines with one bulk
+    insert per table, together with their stored progress, tag links and search documents.
+    """
+    users = []
+    for data in resumes:
+        user = data['user']
+        users.append(User(
+            username=user['username'],
+            email=User.objects.normalize_email(user['email']),
+            # Users imported without a password cannot log in until one is set
+            password=make_password(user.get('password')),
+        ))
+    User.objects.bulk_create(users)
+    if any(user.pk is None for user in users):
+        created = User.objects.in_bulk([user.username for user in users], field_name='username')
+        for user in users:
+            user.pk = created[user.username].pk
+
+    rows = {model: [] for _, model in SECTION_MODELS}
+    progress = []
+    for user, data in zip(users, resumes):
+        counts = dict.fromkeys(PROGRESS_FIELDS.values(), 0)
+        for section, model in SECTION_MODELS:
+            items = data['resume'][section]
+            if items is None:
+                if model not in EMPTY_ROWS:
+                    continue
+                items = EMPTY_ROWS[model]
+            # Sections are listed newest first; inserting them oldest first
+            # keeps that order under ``-created_at, -id``
+            for item in reversed(items) if isinstance(items, list) else [items]:
+                row = model(user_id=user.pk, **item)
+                counts[PROGRESS_FIELDS[model]] += is_complete(row)
+                rows[model].append(row)
+        progress.append(ResumeProgress(user_id=user.pk, **counts))
+
+    for model, model_rows in rows.items():
+        model.objects.bulk_create(model_rows)
+        if model in TAG_FIELDS:
+            sync_tags(model_rows)
+        if model in SEARCH_FIELDS:
+            index_rows(model_rows)
+    ResumeProgress.objects.bulk_create(progress)
+    return users
+
+
+def import_chunk(lines):
+    """
+    Validate and insert one chunk of ``(line_number, text)`` pairs in a
+    single transaction. Returns ``(imported, errors)``.
+
+    A chunk that loses a username race against a concurrent import is
+    validated again, which then rejects the taken usernames.
+    """
+    for attempt in range(2):
+        valid, errors = validate_lines(lines)
+        try:
+            with transaction.atomic():
+                insert_resumes([data for _, data in valid])
+        except IntegrityError:
+            if attempt:
+                raise
+        else:
+            return len(valid), sorted(errors, key=lambda error: error[0])
@@ -0,0 +1,20 @@
+from django.core.management.base import CommandError
+
+
+def iter_batches(queryset, batch_size):
+    """
+    Yield the rows of ``queryset`` in lists of up to ``batch_size``.
+
+    ``iterator()`` streams through a server-side cursor where the database
+    supports one, so memory stays bounded by the batch size.
+    """
+    if batch_size < 1:
+        raise CommandError('--batch-size must be positive')
+    batch = []
+    for row in queryset.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
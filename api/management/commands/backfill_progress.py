@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from api.management.batching import iter_batches
+from api.progress import recompute_progress
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored resume progress of every user from their resume rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of users recomputed per batch')
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        total = 0
+        for batch in iter_batches(user_ids, options['batch_size']):
+            recompute_progress(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed progress for {total} users'))
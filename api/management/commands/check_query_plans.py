@@ -0,0 +1,100 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import PersonalInfo, Experience, Education, Project, Skill
+from api.resume import resume_rows_queryset
+
+
+# Plan fragments that mean a query reads a whole table or sorts its result
+PLAN_PROBLEMS = {
+    'postgresql': [
+        (re.compile(r'\bSeq Scan\b'), 'sequential scan'),
+        (re.compile(r'\bSort\b'), 'explicit sort'),
+    ],
+    'sqlite': [
+        (re.compile(r'\bSCAN\b(?! CONSTANT)'), 'full table scan'),
+        (re.compile(r'TEMP B-TREE'), 'explicit sort'),
+    ],
+}
+
+
+# Section models whose detail views are explained, by label prefix
+DETAIL_MODELS = (('experience', Experience), ('education', Education), ('projects', Project))
+
+
+def sample_user_id():
+    """
+    A user with rows in every list section, so the plans describe real lookups.
+    """
+    users = User.objects.filter(experiences__isnull=False, education__isnull=False, projects__isnull=False)
+    return users.order_by('pk').values_list('pk', flat=True).first()
+
+
+def view_querysets(user):
+    """
+    The querysets the API views run for ``user``, keyed by a readable label.
+    Detail lookups use an existing row of ``user`` in each section.
+    """
+    querysets = {
+        'complete-resume': resume_rows_queryset(user),
+        'personal-info': PersonalInfo.objects.filter(user=user),
+        'skills': Skill.objects.filter(user=user),
+    }
+    for name, model in DETAIL_MODELS:
+        rows = model.objects.filter(user=user)
+        pk = rows.values_list('pk', flat=True).first()
+        if pk is None:
+            raise CommandError(f'User {user.pk} has no {name} rows; pass --user-id of a user with a full resume')
+        querysets[f'{name}-list'] = rows
+        querysets[f'{name}-list (page)'] = rows.order_by('-created_at', '-pk')[:21]
+        querysets[f'{name}-detail'] = rows.filter(pk=pk)
+    return querysets
+
+
+class Command(BaseCommand):
+    help = ('Run EXPLAIN on the queryset of every API view and fail when one of them '
+            'falls back to a sequential scan or an explicit sort')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int,
+                            help='User id the querysets are filtered on; defaults to the first user '
+                                 'with experience, education and project rows')
+        parser.add_argument('--allow-seqscan', action='store_true',
+                            help='On PostgreSQL, keep sequential scans enabled. By default they are '
+                                 'disabled so small development tables still show whether an index '
+                                 'can serve the query')
+        parser.add_argument('--report-only', action='store_true',
+                            help='Print the problems without failing')
+
+    def handle(self, *args, **options):
+        problems = PLAN_PROBLEMS.get(connection.vendor)
+        if problems is None:
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}')
+
+        user_id = options['user_id'] or sample_user_id()
+        if user_id is None:
+            raise CommandError('No user has experience, education and project rows to explain the queries with')
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            raise CommandError(f'User {user_id} does not exist')
+        failures = 0
+        with transaction.atomic():
+            if connection.vendor == 'postgresql' and not options['allow_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset in view_querysets(user).items():
+                plan = queryset.explain()
+                found = sorted({reason for pattern, reason in problems if pattern.search(plan)})
+                if found:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'{label}: {", ".join(found)}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{label}: ok'))
+
+        if failures and not options['report_only']:
+            raise CommandError(f'{failures} queries do not use an index for filtering and ordering')
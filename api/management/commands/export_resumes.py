@@ -0,0 +1,76 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from api.management.batching import iter_batches
+from api.renderers import FastJSONRenderer
+from api.resume import render_resumes
+
+
+class Command(BaseCommand):
+    help = ('Export the complete resume of every user as NDJSON, one '
+            '{"user": ..., "resume": ...} object per line in user id order')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help='File to write to, "-" for stdout')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of users whose sections are fetched per query')
+        parser.add_argument('--from-id', type=int,
+                            help='Lowest user id exported (inclusive)')
+        parser.add_argument('--to-id', type=int,
+                            help='Highest user id exported (exclusive)')
+        parser.add_argument('--shard', type=int,
+                            help='Export only shard SHARD (0-based) of --shards equal user id ranges')
+        parser.add_argument('--shards', type=int, default=1,
+                            help='Number of shards the user id range is split into')
+
+    def handle(self, *args, **options):
+        # Checked before --output is opened and truncated
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        users = User.objects.order_by('pk')
+        if options['from_id'] is not None:
+            users = users.filter(pk__gte=options['from_id'])
+        if options['to_id'] is not None:
+            users = users.filter(pk__lt=options['to_id'])
+        if options['shard'] is not None:
+            users = self.shard(users, options['shard'], options['shards'])
+
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            total = self.export(users, output, options['batch_size'])
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f'Exported {total} resumes'))
+
+    def shard(self, users, shard, shards):
+        """
+        Restrict ``users`` to the ``shard``-th of ``shards`` equal id ranges.
+        """
+        if not 0 <= shard < shards:
+            raise CommandError('--shard must be between 0 and --shards - 1')
+        bounds = users.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return users
+        size = -(-(bounds['high'] - bounds['low'] + 1) // shards)
+        start = bounds['low'] + shard * size
+        return users.filter(pk__gte=start, pk__lt=start + size)
+
+    def export(self, users, output, batch_size):
+        renderer = FastJSONRenderer()
+        total = 0
+        for batch in iter_batches(users.values('id', 'username', 'email'), batch_size):
+            total += self.write_batch(batch, output, renderer)
+        return total
+
+    def write_batch(self, batch, output, renderer):
+        resumes = render_resumes([user['id'] for user in batch])
+        output.write(b''.join(
+            renderer.render({'user': user, 'resume': resumes[user['id']]}) + b'\n'
+            for user in batch
+        ))
+        return len(batch)
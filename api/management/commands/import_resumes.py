@@ -0,0 +1,117 @@
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.importing import import_chunk
+
+
+def _setup_worker():
+    # Needed where worker processes are spawned rather than forked
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = ('Create users and their resumes from a JSONL file with one '
+            '{"user": ..., "resume": ...} object per line, as written by export_resumes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help='JSONL file to import, "-" for stdin')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of lines validated and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Number of worker processes importing chunks in parallel; '
+                                 '0 imports in this process. Use with PostgreSQL')
+        parser.add_argument('--checkpoint',
+                            help='File recording the last line whose chunk and every chunk before it '
+                                 'committed. An interrupted import restarts after that line')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+        self.checkpoint = options['checkpoint']
+        start = self.read_checkpoint()
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            lines = (
+                (line_number, text)
+                for line_number, text in enumerate(source, start=1)
+                if line_number > start and text.strip()
+            )
+            chunks = iter(lambda: list(itertools.islice(lines, batch_size)), [])
+            if options['workers']:
+                imported, failed = self.import_parallel(chunks, options['workers'])
+            else:
+                imported, failed = self.import_serial(chunks)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} resumes, rejected {failed} lines'))
+
+    def import_serial(self, chunks):
+        imported = failed = 0
+        for chunk in chunks:
+            count, errors = import_chunk(chunk)
+            imported += count
+            failed += self.report(errors)
+            self.write_checkpoint(chunk[-1][0])
+        return imported, failed
+
+    def import_parallel(self, chunks, workers):
+        """
+        Import chunks on ``workers`` processes, keeping at most two chunks
+        per worker in memory. Chunks commit out of order, so the checkpoint
+        only advances past chunks whose predecessors all committed.
+        """
+        # Forked workers must not share this process's connections
+        connections.close_all()
+        imported = failed = 0
+        pending = {}
+        # chunk index -> last line, for committed chunks not yet checkpointed
+        committed = {}
+        next_index = 0
+        with ProcessPoolExecutor(workers, initializer=_setup_worker) as executor:
+            for index, chunk in enumerate(itertools.chain(chunks, [None])):
+                if chunk is not None:
+                    pending[executor.submit(import_chunk, chunk)] = (index, chunk[-1][0])
+                # Drain everything once the input is exhausted
+                while pending and (chunk is None or len(pending) >= 2 * workers):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        done_index, last_line = pending.pop(future)
+                        count, errors = future.result()
+                        imported += count
+                        failed += self.report(errors)
+                        committed[done_index] = last_line
+                    while next_index in committed:
+                        self.write_checkpoint(committed.pop(next_index))
+                        next_index += 1
+        return imported, failed
+
+    def report(self, errors):
+        for line_number, error in errors:
+            self.stderr.write(f'line {line_number}: {json.dumps(error)}')
+        return len(errors)
+
+    def read_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+
+    def write_checkpoint(self, line_number):
+        if not self.checkpoint:
+            return
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            checkpoint.write(f'{line_number}\n')
+        os.replace(temporary, self.checkpoint)
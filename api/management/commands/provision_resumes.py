@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.core.management.base import BaseCommand
+
+from api.management.batching import iter_batches
+from api.provisioning import provision_resumes
+from api.resume import invalidate_resume
+
+
+class Command(BaseCommand):
+    help = 'Create the missing personal info, skills and progress rows of users registered before they were provisioned'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of users provisioned per batch')
+
+    def handle(self, *args, **options):
+        missing = Q(personal_info__isnull=True) | Q(skills__isnull=True) | Q(resume_progress__isnull=True)
+        user_ids = User.objects.filter(missing).order_by('pk').values_list('pk', flat=True).distinct()
+        total = 0
+        for batch in iter_batches(user_ids, options['batch_size']):
+            total += self.provision(batch)
+        self.stdout.write(self.style.SUCCESS(f'Provisioned resume rows for {total} users'))
+
+    def provision(self, user_ids):
+        provision_resumes(user_ids)
+        for user_id in user_ids:
+            invalidate_resume(user_id)
+        return len(user_ids)
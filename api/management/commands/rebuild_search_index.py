@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.management.batching import iter_batches
+from api.search import SEARCH_FIELDS, index_rows
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents of every experience, project and education row'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of rows indexed per batch')
+
+    def handle(self, *args, **options):
+        for model in SEARCH_FIELDS:
+            total = 0
+            for batch in iter_batches(model.objects.order_by('pk'), options['batch_size']):
+                index_rows(batch)
+                total += len(batch)
+            self.stdout.write(self.style.SUCCESS(f'Indexed {total} {model._meta.verbose_name_plural}'))
@@ -0,0 +1,158 @@
+import hmac
+import os
+import time
+from contextlib import ExitStack
+from functools import cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+
+# Label of requests that did not resolve to a named API URL
+UNMATCHED = 'unmatched'
+
+# Methods labelled as themselves; others share OTHER_METHOD, so clients
+# cannot add series by sending made-up verbs
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'})
+OTHER_METHOD = 'other'
+
+REQUESTS = Counter(
+    'api_requests_total', 'API requests by URL name, method and status code',
+    ['endpoint', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'api_request_duration_seconds', 'Time spent handling API requests',
+    ['endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERIES = Histogram(
+    'api_request_queries', 'SQL queries run per API request',
+    ['endpoint', 'method'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+QUERY_TIME = Histogram(
+    'api_request_query_duration_seconds', 'Time spent in SQL per API request',
+    ['endpoint', 'method'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+RESPONSE_SIZE = Histogram(
+    'api_response_size_bytes', 'Size of API response bodies',
+    ['endpoint', 'method'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+
+@cache
+def api_url_names():
+    from . import urls
+
+    return frozenset(pattern.name for pattern in urls.urlpatterns if pattern.name)
+
+
+def endpoint_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.url_name not in api_url_names():
+        return UNMATCHED
+    return match.url_name
+
+
+def method_label(request):
+    return request.method if request.method in HTTP_METHODS else OTHER_METHOD
+
+
+class QueryCounter:
+    """
+    ``execute_wrapper`` that counts the queries of a request and their time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def observe(request, response, duration, queries=None):
+    endpoint = endpoint_label(request)
+    method = method_label(request)
+    REQUESTS.labels(endpoint, method, str(response.status_code)).inc()
+    LATENCY.labels(endpoint, method).observe(duration)
+    if queries is not None:
+        QUERIES.labels(endpoint, method).observe(queries.count)
+        QUERY_TIME.labels(endpoint, method).observe(queries.duration)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(endpoint, method).observe(len(response.content))
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status code and response size of every request per URL
+    name of ``api/urls.py``, and the number and duration of its SQL queries.
+
+    Queries are counted on the request thread's connections, so requests
+    served by async views report no query metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        observe(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        observe(request, response, time.perf_counter() - start)
+        return response
+
+
+def metrics_registry():
+    """
+    The registry to expose: with ``PROMETHEUS_MULTIPROC_DIR`` set (e.g.
+    under gunicorn), one aggregating the samples every worker wrote there.
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@require_GET
+def metrics(request):
+    """
+    Request metrics in the Prometheus text format. Requires
+    ``Authorization: Bearer <METRICS_TOKEN>``; without a configured token
+    every scrape is refused.
+    """
+    if not settings.METRICS_TOKEN:
+        return HttpResponseForbidden()
+    expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
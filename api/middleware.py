@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+def is_lean_api_request(request):
+    """
+    Token-authenticated requests to the API need no session, CSRF or
+    messages handling when the lean API profile is enabled.
+    """
+    return (
+        settings.API_LEAN_PROFILE
+        and 'HTTP_AUTHORIZATION' in request.META
+        and request.path_info.startswith(tuple(settings.API_LEAN_PATH_PREFIXES))
+    )
+
+
+class LeanApiMiddlewareMixin:
+    """
+    Pass lean API requests straight through the wrapped middleware.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if is_lean_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if is_lean_api_request(request):
+            return await self.get_response(request)
+        return await super().__acall__(request)
+
+
+class LeanSessionMiddleware(LeanApiMiddlewareMixin, SessionMiddleware):
+    pass
+
+
+class LeanCsrfViewMiddleware(LeanApiMiddlewareMixin, CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class LeanAuthenticationMiddleware(LeanApiMiddlewareMixin, AuthenticationMiddleware):
+    pass
+
+
+class LeanMessageMiddleware(LeanApiMiddlewareMixin, MessageMiddleware):
+    pass
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_education_user_experience_user_personalinfo_user_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('personal_info', models.PositiveIntegerField(default=0)),
+                ('experience', models.PositiveIntegerField(default=0)),
+                ('education', models.PositiveIntegerField(default=0)),
+                ('projects', models.PositiveIntegerField(default=0)),
+                ('skills', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resume_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resume Progress',
+                'verbose_name_plural': 'Resume Progress',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_resumeprogress'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='education',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Education', 'verbose_name_plural': 'Education'},
+        ),
+        migrations.AlterModelOptions(
+            name='experience',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Work Experience', 'verbose_name_plural': 'Work Experiences'},
+        ),
+        migrations.AlterModelOptions(
+            name='project',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Project', 'verbose_name_plural': 'Projects'},
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_order_by_created_at_and_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='education_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='experience_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='project_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:03
+
+import re
+
+from django.db import migrations, models
+
+
+# Copy of the tag parsing in api/tags.py as of this migration, so later
+# changes there don't alter what the backfill does.
+MAX_TAG_LENGTH = 100
+
+
+def split_tags(text):
+    tags = {}
+    for name in (text or '').split(','):
+        name = re.sub(r'\s+', ' ', name).strip()
+        normalized_name = name.casefold()
+        if normalized_name and len(normalized_name) <= MAX_TAG_LENGTH:
+            tags.setdefault(normalized_name, name)
+    return tags
+
+
+def link_tags(tag_model, through, source, rows):
+    links = {pk: split_tags(text) for pk, text in rows}
+    names = {}
+    for tags in links.values():
+        for normalized_name, name in tags.items():
+            names.setdefault(normalized_name, name)
+    tag_model.objects.bulk_create(
+        [tag_model(name=name, normalized_name=normalized_name) for normalized_name, name in names.items()],
+        ignore_conflicts=True,
+    )
+    tag_ids = dict(tag_model.objects.filter(normalized_name__in=names).values_list('normalized_name', 'pk'))
+    through.objects.bulk_create([
+        through(**{f'{source}_id': pk, f'{tag_model._meta.model_name}_id': tag_ids[normalized_name]})
+        for pk, tags in links.items()
+        for normalized_name in tags
+    ])
+
+
+def backfill_tags(apps, schema_editor):
+    for model_name, text_field, tag_model_name, m2m_field in (
+        ('Skill', 'skills', 'SkillTag', 'tags'),
+        ('Project', 'technologies', 'TechnologyTag', 'technology_tags'),
+    ):
+        model = apps.get_model('api', model_name)
+        tag_model = apps.get_model('api', tag_model_name)
+        through = getattr(model, m2m_field).through
+        rows = model.objects.order_by('pk').values_list('pk', text_field)
+        batch = []
+        for row in rows.iterator(chunk_size=1000):
+            batch.append(row)
+            if len(batch) == 1000:
+                link_tags(tag_model, through, model._meta.model_name, batch)
+                batch = []
+        link_tags(tag_model, through, model._meta.model_name, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_user_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Skill Tag',
+                'verbose_name_plural': 'Skill Tags',
+            },
+        ),
+        migrations.CreateModel(
+            name='TechnologyTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Technology Tag',
+                'verbose_name_plural': 'Technology Tags',
+            },
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='skills', to='api.skilltag'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='technology_tags',
+            field=models.ManyToManyField(blank=True, related_name='projects', to='api.technologytag'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -11,6 +14,7 @@ class PersonalInfo(models.Model):
     professional_title = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)  # bumped on every write, served as the ETag
 
     class Meta:
         verbose_name = "Personal Information"
@@ -29,9 +33,13 @@ class Experience(models.Model):
     description = models.TextField(blank=True)  # bullet points
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)  # bumped on every write, served as the ETag
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='experience_user_created_idx'),
+        ]
         verbose_name = "Work Experience"
         verbose_name_plural = "Work Experiences"
 
@@ -47,9 +55,13 @@ class Education(models.Model):
     education_location = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)  # bumped on every write, served as the ETag
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='education_user_created_idx'),
+        ]
         verbose_name = "Education"
         verbose_name_plural = "Education"
 
@@ -63,11 +75,16 @@ class Project(models.Model):
     duration = models.CharField(max_length=50, blank=True)  # e.g., "03/2023 - 05/2023"
     description = models.TextField(blank=True)  # bullet points
     technologies = models.TextField(blank=True)  # comma-separated technologies
+    technology_tags = models.ManyToManyField('TechnologyTag', related_name='projects', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)  # bumped on every write, served as the ETag
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='project_user_created_idx'),
+        ]
         verbose_name = "Project"
         verbose_name_plural = "Projects"
 
@@ -78,8 +95,10 @@ class Project(models.Model):
 class Skill(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='skills', null=True, blank=True)
     skills = models.TextField(blank=True)  # comma-separated skills string
+    tags = models.ManyToManyField('SkillTag', related_name='skills', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)  # bumped on every write, served as the ETag
 
     class Meta:
         verbose_name = "Skill"
@@ -87,3 +106,107 @@ class Skill(models.Model):
 
     def __str__(self):
         return "Skills"
+
+
+class ResumeProgress(models.Model):
+    """Number of complete rows per resume section, maintained on write."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='resume_progress')
+    personal_info = models.PositiveIntegerField(default=0)
+    experience = models.PositiveIntegerField(default=0)
+    education = models.PositiveIntegerField(default=0)
+    projects = models.PositiveIntegerField(default=0)
+    skills = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resume Progress"
+        verbose_name_plural = "Resume Progress"
+
+    def __str__(self):
+        return f"Progress of {self.user_id}"
+
+
+class SkillTag(models.Model):
+    """One normalized entry of the comma-separated ``Skill.skills`` text."""
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        verbose_name = "Skill Tag"
+        verbose_name_plural = "Skill Tags"
+
+    def __str__(self):
+        return self.name
+
+
+class TechnologyTag(models.Model):
+    """One normalized entry of the comma-separated ``Project.technologies`` text."""
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        verbose_name = "Technology Tag"
+        verbose_name_plural = "Technology Tags"
+
+    def __str__(self):
+        return self.name
+
+
+class SearchDocument(models.Model):
+    """Searchable text of one experience, project or education row, maintained on write."""
+    section = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents')
+    title = models.TextField(blank=True)
+    subtitle = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    vector = SearchVectorField(null=True)  # filled on PostgreSQL only
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'object_id'], name='search_document_unique'),
+        ]
+        indexes = [
+            GinIndex(fields=['vector'], name='search_document_vector_idx'),
+        ]
+        verbose_name = "Search Document"
+        verbose_name_plural = "Search Documents"
+
+    def __str__(self):
+        return f"{self.section} {self.object_id}"
+
+
+class SearchTerm(models.Model):
+    """Inverted index posting for databases without full-text search."""
+    term = models.CharField(max_length=100)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='terms')
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'document'], name='search_term_idx'),
+        ]
+        verbose_name = "Search Term"
+        verbose_name_plural = "Search Terms"
+
+    def __str__(self):
+        return self.term
+
+
+class Tombstone(models.Model):
+    """Record of a deleted section row, served by the delta-sync endpoint."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    section = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+        verbose_name = "Tombstone"
+        verbose_name_plural = "Tombstones"
+
+    def __str__(self):
+        return f"{self.section} {self.object_id}"
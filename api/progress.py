@@ -0,0 +1,125 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import PersonalInfo, Experience, Education, Project, Skill, ResumeProgress
+
+
+# Model -> ResumeProgress counter holding its number of complete rows
+PROGRESS_FIELDS = {
+    PersonalInfo: 'personal_info',
+    Experience: 'experience',
+    Education: 'education',
+    Project: 'projects',
+    Skill: 'skills',
+}
+
+# Fields that must be filled (ignoring whitespace) for a row to count as complete.
+# Personal info only needs a full name, whitespace included.
+REQUIRED_FIELDS = {
+    PersonalInfo: ('full_name',),
+    Experience: ('title', 'company', 'location', 'duration', 'description'),
+    Education: ('degree', 'institution', 'education_duration', 'education_location'),
+    Project: ('name', 'duration', 'description', 'technologies'),
+    Skill: ('skills',),
+}
+
+# ResumeProgress counter -> key of the ``progress`` block in the resume response
+PROGRESS_KEYS = {
+    'personal_info': 'personalInfo',
+    'experience': 'experience',
+    'education': 'education',
+    'projects': 'projects',
+    'skills': 'skills',
+}
+
+
+def row_is_complete(model, row):
+    """
+    Whether ``row``, a mapping of field values of ``model``, counts as complete.
+    """
+    if model is PersonalInfo:
+        return bool(row['full_name'])
+    return all(row[field] and row[field].strip() for field in REQUIRED_FIELDS[model])
+
+
+def is_complete(instance):
+    if instance is None:
+        return False
+    model = type(instance)
+    return row_is_complete(model, {field: getattr(instance, field) for field in REQUIRED_FIELDS[model]})
+
+
+def compute_progress_counts(user_ids):
+    """
+    Count complete rows per section for every user in ``user_ids`` by
+    scanning their resume rows.
+    """
+    counts = {user_id: dict.fromkeys(PROGRESS_FIELDS.values(), 0) for user_id in user_ids}
+    for model, counter in PROGRESS_FIELDS.items():
+        rows = model.objects.filter(user_id__in=user_ids).only('user_id', *REQUIRED_FIELDS[model])
+        for instance in rows.order_by():
+            if is_complete(instance):
+                counts[instance.user_id][counter] += 1
+    return counts
+
+
+def recompute_progress(user_ids):
+    counts = compute_progress_counts(user_ids)
+    ResumeProgress.objects.bulk_create(
+        [ResumeProgress(user_id=user_id, **user_counts) for user_id, user_counts in counts.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=list(PROGRESS_FIELDS.values()),
+    )
+
+
+def record_progress(user, model, was_complete, now_complete):
+    """
+    Apply the completion change of one row of ``model`` to the stored
+    progress of ``user``.
+    """
+    record_progress_delta(user, model, int(now_complete) - int(was_complete))
+
+
+def record_progress_delta(user, model, delta):
+    """
+    Add ``delta`` complete rows of ``model`` to the stored progress of
+    ``user``. Users whose progress was never stored get a full recount.
+    """
+    if not delta:
+        return
+    counter = PROGRESS_FIELDS[model]
+    updated = ResumeProgress.objects.filter(user=user).update(**{counter: Greatest(F(counter) + delta, 0)})
+    if not updated:
+        recompute_progress([user.pk])
+
+
+def progress_percentages(progress):
+    return {
+        key: 100 if getattr(progress, counter) > 0 else 0
+        for counter, key in PROGRESS_KEYS.items()
+    }
+
+
+def progress_from_rows(rows_by_model):
+    """
+    Progress percentages derived from the rows themselves, for users whose
+    progress was never stored.
+    """
+    return {
+        PROGRESS_KEYS[PROGRESS_FIELDS[model]]: 100 if any(row_is_complete(model, row) for row in rows) else 0
+        for model, rows in rows_by_model.items()
+    }
+
+
+def progress_from_instances(instances_by_model):
+    """
+    ``progress_from_rows`` for model instances; ``None`` entries are skipped.
+    """
+    return progress_from_rows({
+        model: [
+            {field: getattr(instance, field) for field in REQUIRED_FIELDS[model]}
+            for instance in instances if instance is not None
+        ]
+        for model, instances in instances_by_model.items()
+    })
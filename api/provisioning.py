@@ -0,0 +1,32 @@
+from django.db import transaction
+
+from .models import PersonalInfo, Skill, ResumeProgress
+from .progress import recompute_progress
+
+
+# Singleton rows every user has from registration on, with their empty values
+EMPTY_ROWS = {
+    PersonalInfo: {'full_name': '', 'email': '', 'phone': '', 'location': '', 'professional_title': ''},
+    Skill: {'skills': ''},
+}
+
+
+def provision_resumes(user_ids, new_users=False):
+    """
+    Create the missing personal info, skills and progress rows of
+    ``user_ids``, so their singleton endpoints only ever read.
+
+    Missing progress is counted from the user's rows; ``new_users`` skips
+    that count for users known to have none.
+    """
+    user_ids = list(user_ids)
+    with transaction.atomic():
+        for model, values in EMPTY_ROWS.items():
+            model.objects.bulk_create([model(user_id=pk, **values) for pk in user_ids], ignore_conflicts=True)
+        if new_users:
+            ResumeProgress.objects.bulk_create([ResumeProgress(user_id=pk) for pk in user_ids])
+            return
+        stored = set(ResumeProgress.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        missing = [pk for pk in user_ids if pk not in stored]
+        if missing:
+            recompute_progress(missing)
@@ -0,0 +1,59 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is installed.
+
+    The output is byte-identical to ``JSONRenderer`` with the default compact,
+    unicode settings. Indented output and data orjson cannot encode natively
+    fall back to ``JSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by JSONRenderer too, since they are invalid in JavaScript strings
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class DocumentRenderer(BaseRenderer):
+    """
+    Renderer for views that answer with finished documents as ``bytes``.
+
+    Error responses have no document to show, so they are rendered as the
+    plain-text ``detail`` of the error.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'text/plain; charset=utf-8'
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode()
+
+
+class HTMLDocumentRenderer(DocumentRenderer):
+    media_type = 'text/html'
+    format = 'html'
+    charset = 'utf-8'
+
+
+class PDFDocumentRenderer(DocumentRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
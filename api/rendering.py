@@ -0,0 +1,201 @@
+import hashlib
+import textwrap
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .resume import get_resume
+
+
+# Bump whenever the HTML template or the PDF layout changes, so artifacts
+# rendered with the previous layout are no longer served.
+TEMPLATE_VERSION = '2'
+
+CONTENT_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+
+class UnsupportedCharacters(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_code = 'unsupported_characters'
+
+    def __init__(self, characters):
+        super().__init__(
+            f'The PDF fonts cannot show {"".join(sorted(characters))}. '
+            f'Use /api/resume/render/html/ for resumes with these characters.'
+        )
+
+
+def _context(data):
+    personal_info = data['personal_info'] or {}
+    contact = [personal_info.get(field) for field in ('email', 'phone', 'location')]
+    return {
+        'personal_info': personal_info,
+        'contact': [value for value in contact if value],
+        'experiences': data['experiences'],
+        'education': data['education'],
+        'projects': data['projects'],
+        'skills': data['skills'] or {},
+    }
+
+
+def render_html(data):
+    return render_to_string('api/resume.html', _context(data)).encode()
+
+
+def _joined(*parts, separator=' · '):
+    return separator.join(part for part in parts if part)
+
+
+def _pdf_lines(data):
+    """
+    The resume as ``(style, text)`` lines in reading order.
+    """
+    context = _context(data)
+    lines = [
+        ('name', context['personal_info'].get('full_name') or ''),
+        ('subtitle', context['personal_info'].get('professional_title') or ''),
+        ('meta', _joined(*context['contact'])),
+    ]
+    if context['experiences']:
+        lines.append(('heading', 'EXPERIENCE'))
+    for experience in context['experiences']:
+        lines.append(('entry', _joined(experience['title'], experience['company'], separator=', ')))
+        lines.append(('meta', _joined(experience['duration'], experience['location'])))
+        lines.extend(('body', line) for line in experience['description'].splitlines())
+    if context['education']:
+        lines.append(('heading', 'EDUCATION'))
+    for entry in context['education']:
+        lines.append(('entry', _joined(entry['degree'], entry['institution'], separator=', ')))
+        lines.append(('meta', _joined(entry['education_duration'], entry['education_location'])))
+    if context['projects']:
+        lines.append(('heading', 'PROJECTS'))
+    for project in context['projects']:
+        lines.append(('entry', project['name']))
+        lines.append(('meta', _joined(project['duration'], project['technologies'])))
+        lines.extend(('body', line) for line in project['description'].splitlines())
+    if context['skills'].get('skills'):
+        lines.append(('heading', 'SKILLS'))
+        lines.append(('body', context['skills']['skills']))
+    return [(style, text) for style, text in lines if text.strip()]
+
+
+# style -> (font resource, font size, space before the line)
+PDF_STYLES = {
+    'name': ('F2', 20, 0),
+    'subtitle': ('F1', 12, 6),
+    'heading': ('F2', 12, 16),
+    'entry': ('F2', 11, 8),
+    'meta': ('F1', 9, 2),
+    'body': ('F1', 10, 2),
+}
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 612, 792, 54
+
+
+def _pdf_unsupported(lines):
+    """
+    Characters of ``lines`` outside WinAnsiEncoding, which the standard
+    fonts cannot show.
+    """
+    unsupported = set()
+    for _, text in lines:
+        for char in set(text):
+            try:
+                char.encode('cp1252')
+            except UnicodeEncodeError:
+                unsupported.add(char)
+    return unsupported
+
+
+def _pdf_text(text):
+    text = text.encode('cp1252')
+    return text.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _pdf_pages(lines):
+    pages, commands, y = [], [], PAGE_HEIGHT - MARGIN
+    for style, text in lines:
+        font, size, space_before = PDF_STYLES[style]
+        # Helvetica averages about half an em per character
+        width = max(int((PAGE_WIDTH - 2 * MARGIN) / (size * 0.5)), 1)
+        for index, chunk in enumerate(textwrap.wrap(text, width) or ['']):
+            y -= size * 1.25 + (space_before if index == 0 else 0)
+            if y < MARGIN:
+                pages.append(b'\n'.join(commands))
+                commands, y = [], PAGE_HEIGHT - MARGIN - size * 1.25
+            commands.append(b'BT /%s %d Tf %d %.2f Td (%s) Tj ET' % (
+                font.encode(), size, MARGIN, y, _pdf_text(chunk)))
+    pages.append(b'\n'.join(commands))
+    return pages
+
+
+def render_pdf(data):
+    """
+    Lay the resume out as a plain-text PDF using the standard Helvetica
+    fonts, which every PDF reader ships, so no rendering engine is needed.
+
+    Those fonts only cover WinAnsiEncoding; resumes with other characters
+    raise ``UnsupportedCharacters`` rather than losing them.
+    """
+    lines = _pdf_lines(data)
+    unsupported = _pdf_unsupported(lines)
+    if unsupported:
+        raise UnsupportedCharacters(unsupported)
+    pages = _pdf_pages(lines)
+    first_page = 5
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % (first_page + 2 * index) for index in range(len(pages))), len(pages)),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    for index, content in enumerate(pages):
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+            % (PAGE_WIDTH, PAGE_HEIGHT, first_page + 2 * index + 1)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content))
+
+    document = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(document))
+        document += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(document)
+    document += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    document += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    document += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(document)
+
+
+RENDERERS = {
+    'html': render_html,
+    'pdf': render_pdf,
+}
+
+
+def get_rendered_resume(user, fmt):
+    """
+    Return ``(content, etag)`` of the resume of ``user`` rendered as ``fmt``.
+
+    Artifacts are cached under a hash of the resume content and
+    ``TEMPLATE_VERSION``, so an unchanged resume is served from the cache
+    and edits never need to invalidate anything.
+    """
+    data, resume_etag = get_resume(user)
+    digest = hashlib.sha256(f'{fmt}:{TEMPLATE_VERSION}:{resume_etag}'.encode()).hexdigest()
+    key = f'resume-render:{digest}'
+    render_cache = caches[settings.RESUME_RENDER_CACHE]
+
+    content = render_cache.get(key)
+    if content is None:
+        content = RENDERERS[fmt](data)
+        render_cache.set(key, content, timeout=settings.RESUME_RENDER_CACHE_TIMEOUT)
+    return content, f'"{digest}"'
@@ -0,0 +1,367 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from functools import partial
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast
+
+from .models import ResumeProgress
+from .progress import PROGRESS_KEYS, compute_progress_counts, progress_from_rows, progress_percentages
+from .serializers import (
+    PersonalInfoSerializer, ExperienceSerializer, EducationSerializer,
+    ProjectSerializer, SkillSerializer, represent_rows
+)
+
+
+# Section name -> serializer whose representation the section is rendered in
+RESUME_SECTIONS = {
+    'personal_info': PersonalInfoSerializer,
+    'experiences': ExperienceSerializer,
+    'education': EducationSerializer,
+    'projects': ProjectSerializer,
+    'skills': SkillSerializer,
+}
+
+SINGLETON_SECTIONS = ('personal_info', 'skills')
+
+# Top-level keys of the resume representation
+RESUME_PARTS = (*RESUME_SECTIONS, 'progress')
+
+# Columns every section row has; the remaining serializer fields are its content
+ROW_FIELDS = ('id', 'created_at', 'updated_at')
+
+
+def section_model(section):
+    return RESUME_SECTIONS[section].Meta.model
+
+
+def content_columns(section):
+    return [field for field in RESUME_SECTIONS[section].Meta.fields if field not in ROW_FIELDS]
+
+
+# Every section is folded into the same text columns so all of them can be
+# read with one UNION ALL query.
+CONTENT_COLUMNS = max(len(content_columns(section)) for section in RESUME_SECTIONS)
+
+
+def _section_queryset(user, section, fields=None):
+    """
+    ``fields`` limits the content columns read; the others are selected as NULL.
+    """
+    columns = content_columns(section)
+    values = {
+        'section': Value(section, output_field=CharField()),
+        'row_id': F('pk'),
+        'created': F('created_at'),
+        'updated': F('updated_at'),
+    }
+    for index in range(CONTENT_COLUMNS):
+        if index < len(columns) and (fields is None or columns[index] in fields):
+            values[f'c{index}'] = F(columns[index])
+        else:
+            values[f'c{index}'] = Value(None, output_field=CharField())
+    return section_model(section).objects.filter(user=user).order_by().values(**values)
+
+
+def _progress_queryset(user):
+    values = {
+        'section': Value('progress', output_field=CharField()),
+        'row_id': F('pk'),
+        'created': F('updated_at'),
+        'updated': F('updated_at'),
+    }
+    for index, counter in enumerate(PROGRESS_KEYS):
+        values[f'c{index}'] = Cast(counter, output_field=CharField())
+    return ResumeProgress.objects.filter(user=user).order_by().values(**values)
+
+
+def _section_row(row):
+    values = {'id': row['row_id'], 'created_at': row['created'], 'updated_at': row['updated']}
+    for index, column in enumerate(content_columns(row['section'])):
+        values[column] = row[f'c{index}']
+    return values
+
+
+def _progress_row(row):
+    return {counter: int(row[f'c{index}']) for index, counter in enumerate(PROGRESS_KEYS)}
+
+
+def resume_rows_queryset(user, parts=RESUME_PARTS, fields=None):
+    """
+    UNION ALL of the resume sections of ``user`` in ``parts`` plus its
+    stored progress, reading only ``fields[section]`` where given.
+
+    The union is left unordered so each branch stays a plain index read;
+    ``render_resume`` restores ``Meta.ordering`` in Python.
+    """
+    fields = fields or {}
+    querysets = [
+        _section_queryset(user, section, fields.get(section))
+        for section in RESUME_SECTIONS if section in parts
+    ]
+    if 'progress' in parts:
+        querysets.append(_progress_queryset(user))
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def assemble_resume(sections, progress, parts=RESUME_PARTS, fields=None):
+    """
+    Build the ``CompleteResumeSerializer`` representation from ``.values()``
+    rows per section (in ``Meta.ordering``) and the stored progress counters,
+    or ``None`` when the user has no stored progress yet.
+
+    Only ``parts`` are included, each section limited to ``fields[section]``
+    where given.
+    """
+    fields = fields or {}
+    resume = {}
+    for section, serializer_class in RESUME_SECTIONS.items():
+        if section not in parts:
+            continue
+        rows = represent_rows(serializer_class, sections.get(section, []), fields.get(section))
+        if section in SINGLETON_SECTIONS:
+            resume[section] = rows[0] if rows else None
+        else:
+            resume[section] = rows
+
+    if 'progress' not in parts:
+        return resume
+    if progress is not None:
+        resume['progress'] = progress_percentages(ResumeProgress(**progress))
+    else:
+        resume['progress'] = progress_from_rows({
+            section_model(section): sections.get(section, []) for section in RESUME_SECTIONS
+        })
+    return resume
+
+
+def render_resume(user, parts=RESUME_PARTS, fields=None):
+    """
+    Render the resume of ``user`` from a single database round trip,
+    optionally limited to some ``parts`` and ``fields`` per section.
+    """
+    rows = resume_rows_queryset(user, parts, fields)
+    rows = sorted(rows, key=itemgetter('created', 'row_id'), reverse=True)
+
+    sections = defaultdict(list)
+    progress = None
+    for row in rows:
+        if row['section'] == 'progress':
+            progress = _progress_row(row)
+        else:
+            sections[row['section']].append(_section_row(row))
+
+    if 'progress' in parts and progress is None and (set(parts) != set(RESUME_PARTS) or fields):
+        # The rows read cannot tell whether every section is complete
+        progress = compute_progress_counts([user.pk])[user.pk]
+    return assemble_resume(sections, progress, parts, fields)
+
+
+def render_changed_rows(user, since=None):
+    """
+    Representation of the section rows of ``user`` updated after ``since``
+    (all rows when ``None``), per section and newest first, read with one
+    UNION query.
+    """
+    querysets = []
+    for section in RESUME_SECTIONS:
+        queryset = _section_queryset(user, section)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+        querysets.append(queryset)
+    rows = sorted(querysets[0].union(*querysets[1:], all=True), key=itemgetter('created', 'row_id'), reverse=True)
+
+    sections = defaultdict(list)
+    for row in rows:
+        sections[row['section']].append(_section_row(row))
+    return {
+        section: represent_rows(serializer_class, sections[section])
+        for section, serializer_class in RESUME_SECTIONS.items()
+    }
+
+
+def select_resume(data, parts, fields=None):
+    """
+    Limit a complete resume representation to ``parts`` and ``fields``.
+    """
+    fields = fields or {}
+    resume = {}
+    for part in RESUME_PARTS:
+        if part not in parts:
+            continue
+        value = data[part]
+        if part in fields and value is not None:
+            if part in SINGLETON_SECTIONS:
+                value = {field: item for field, item in value.items() if field in fields[part]}
+            else:
+                value = [{field: item for field, item in row.items() if field in fields[part]} for row in value]
+        resume[part] = value
+    return resume
+
+
+def render_resumes(user_ids):
+    """
+    Render the complete resumes of ``user_ids`` with one query per section
+    table for the whole batch, keyed by user id.
+    """
+    sections = {user_id: defaultdict(list) for user_id in user_ids}
+    for section, serializer_class in RESUME_SECTIONS.items():
+        rows = section_model(section).objects.filter(user_id__in=user_ids).values(
+            'user_id', *serializer_class.Meta.fields
+        )
+        for row in rows:
+            sections[row['user_id']][section].append(row)
+    progress = {
+        row.pop('user_id'): row
+        for row in ResumeProgress.objects.filter(user_id__in=user_ids).values('user_id', *PROGRESS_KEYS)
+    }
+    return {user_id: assemble_resume(sections[user_id], progress.get(user_id)) for user_id in user_ids}
+
+
+def _read_rows(queryset):
+    try:
+        return list(queryset)
+    finally:
+        # Runs on an executor thread with its own connection. Close it even
+        # within CONN_MAX_AGE, or every executor thread keeps one open (with
+        # DB_POOL it goes back to the pool).
+        connections[queryset.db].close()
+
+
+async def arender_resume(user):
+    """
+    Async counterpart of ``render_resume`` that runs one query per section
+    concurrently, each on its own thread and database connection, so the
+    total latency is that of the slowest query rather than the sum.
+    """
+    querysets = {
+        section: section_model(section).objects.filter(user=user).values(*serializer_class.Meta.fields)
+        for section, serializer_class in RESUME_SECTIONS.items()
+    }
+    querysets['progress'] = ResumeProgress.objects.filter(user=user).values(*PROGRESS_KEYS)
+    results = dict(zip(querysets, await asyncio.gather(*(
+        sync_to_async(_read_rows, thread_sensitive=False)(queryset)
+        for queryset in querysets.values()
+    ))))
+
+    progress = results.pop('progress')
+    return assemble_resume(results, progress[0] if progress else None)
+
+
+def _generation_key(user_id):
+    return f'resume:{user_id}:generation'
+
+
+def _payload_key(user_id):
+    return f'resume:{user_id}:payload'
+
+
+def _new_generation():
+    return time.time_ns()
+
+
+def _current_generation(user_id):
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        generation = _new_generation()
+        if not cache.add(_generation_key(user_id), generation, timeout=None):
+            generation = cache.get(_generation_key(user_id))
+    return generation
+
+
+def resume_etag(data):
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return '"%s"' % hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _valid_entry(cached, user_id):
+    generation = cached.get(_generation_key(user_id))
+    entry = cached.get(_payload_key(user_id))
+    if generation is not None and entry is not None and entry['generation'] == generation:
+        return entry
+    return None
+
+
+def get_resume(user):
+    """
+    Return ``(data, etag)`` for the complete resume of ``user``.
+
+    Payloads are cached per user and tagged with the user's cache generation.
+    Writes bump the generation instead of deleting the payload, so a render
+    that raced with a write can never be served after that write committed.
+    """
+    cached = cache.get_many([_generation_key(user.pk), _payload_key(user.pk)])
+    entry = _valid_entry(cached, user.pk)
+    if entry is not None:
+        return entry['data'], entry['etag']
+
+    generation = cached.get(_generation_key(user.pk)) or _current_generation(user.pk)
+    data = render_resume(user)
+    etag = resume_etag(data)
+    cache.set(
+        _payload_key(user.pk),
+        {'generation': generation, 'data': data, 'etag': etag},
+        timeout=settings.RESUME_CACHE_TIMEOUT,
+    )
+    return data, etag
+
+
+def get_resume_selection(user, parts, fields=None):
+    """
+    Return ``(data, etag)`` for some ``parts`` and ``fields`` of the resume
+    of ``user``: sliced from the cached complete resume when there is one,
+    otherwise read with only the queries and columns the selection needs.
+    Partial renders are not cached.
+    """
+    cached = cache.get_many([_generation_key(user.pk), _payload_key(user.pk)])
+    entry = _valid_entry(cached, user.pk)
+    if entry is not None:
+        data = select_resume(entry['data'], parts, fields)
+    else:
+        data = render_resume(user, parts, fields)
+    return data, resume_etag(data)
+
+
+async def aget_resume(user):
+    """
+    Async counterpart of ``get_resume`` sharing its cache entries.
+    """
+    cached = await cache.aget_many([_generation_key(user.pk), _payload_key(user.pk)])
+    entry = _valid_entry(cached, user.pk)
+    if entry is not None:
+        return entry['data'], entry['etag']
+
+    generation = cached.get(_generation_key(user.pk)) or await sync_to_async(_current_generation)(user.pk)
+    data = await arender_resume(user)
+    etag = resume_etag(data)
+    await cache.aset(
+        _payload_key(user.pk),
+        {'generation': generation, 'data': data, 'etag': etag},
+        timeout=settings.RESUME_CACHE_TIMEOUT,
+    )
+    return data, etag
+
+
+def _bump_generation(user_id):
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.set(_generation_key(user_id), _new_generation(), timeout=None)
+
+
+def invalidate_resume(user_id):
+    """
+    Drop the cached resume of ``user_id`` once the current transaction commits.
+    """
+    if user_id is None:
+        return
+    transaction.on_commit(partial(_bump_generation, user_id))
@@ -0,0 +1,9 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """
+    Document ``StatelessJWTAuthentication`` as the ``jwtAuth`` bearer scheme
+    of the simplejwt authentication it replaces.
+    """
+    target_class = 'api.authentication.StatelessJWTAuthentication'
@@ -0,0 +1,174 @@
+import math
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Experience, Education, Project, SearchDocument, SearchTerm
+from .serializers import EducationSerializer, ExperienceSerializer, ProjectSerializer, represent_row
+
+
+SEARCH_CONFIG = 'english'
+
+# Model -> (section, serializer, fields per document column). ``title``,
+# ``subtitle`` and ``body`` are weighted A, B and C.
+SEARCH_FIELDS = {
+    Experience: ('experiences', ExperienceSerializer, {
+        'title': ('title',),
+        'subtitle': ('company',),
+        'body': ('description',),
+    }),
+    Project: ('projects', ProjectSerializer, {
+        'title': ('name',),
+        'subtitle': ('technologies',),
+        'body': ('description',),
+    }),
+    Education: ('education', EducationSerializer, {
+        'title': ('degree',),
+        'subtitle': ('institution',),
+        'body': (),
+    }),
+}
+SECTION_MODELS = {section: model for model, (section, _, _) in SEARCH_FIELDS.items()}
+
+DOCUMENT_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('subtitle', weight='B', config=SEARCH_CONFIG)
+    + SearchVector('body', weight='C', config=SEARCH_CONFIG)
+)
+
+# Same per-column weights ts_rank uses by default
+COLUMN_WEIGHTS = {'title': 1.0, 'subtitle': 0.4, 'body': 0.2}
+
+
+def uses_full_text_search():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """
+    Terms of the pure-Python index: lowercased words, without stemming.
+    """
+    return [term for term in re.findall(r'\w+', (text or '').casefold()) if len(term) <= 100]
+
+
+def _document(instance):
+    section, _, columns = SEARCH_FIELDS[type(instance)]
+    values = {
+        column: '\n'.join(getattr(instance, field) or '' for field in fields)
+        for column, fields in columns.items()
+    }
+    return SearchDocument(section=section, object_id=instance.pk, user_id=instance.user_id, **values)
+
+
+def _postings(document):
+    weights = defaultdict(float)
+    for column, weight in COLUMN_WEIGHTS.items():
+        for term in tokenize(getattr(document, column)):
+            weights[term] += weight
+    return [SearchTerm(term=term, document_id=document.pk, weight=weight) for term, weight in weights.items()]
+
+
+def index_rows(instances):
+    """
+    Create or refresh the search documents of rows of one searchable model.
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return
+    section = SEARCH_FIELDS[type(instances[0])][0]
+    documents = [_document(instance) for instance in instances]
+    with transaction.atomic():
+        SearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['section', 'object_id'],
+            update_fields=['user', 'title', 'subtitle', 'body'],
+        )
+        stored = SearchDocument.objects.filter(section=section, object_id__in=[doc.object_id for doc in documents])
+        if uses_full_text_search():
+            stored.update(vector=DOCUMENT_VECTOR)
+            return
+        pks = dict(stored.values_list('object_id', 'pk'))
+        for document in documents:
+            document.pk = pks[document.object_id]
+        SearchTerm.objects.filter(document_id__in=pks.values()).delete()
+        SearchTerm.objects.bulk_create([posting for document in documents for posting in _postings(document)])
+
+
+def unindex_rows(model, pks):
+    SearchDocument.objects.filter(section=SEARCH_FIELDS[model][0], object_id__in=pks).delete()
+
+
+def _rank_postgres(query, offset, limit):
+    query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return list(
+        SearchDocument.objects.filter(vector=query)
+        .annotate(rank=SearchRank(F('vector'), query))
+        .order_by('-rank', 'pk')
+        .values('section', 'object_id', 'user_id', 'rank')[offset:offset + limit]
+    )
+
+
+def _rank_inverted_index(query, offset, limit):
+    """
+    Documents containing every query term, ranked by the sum of their
+    weighted term frequencies times the inverse document frequency.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    postings = defaultdict(dict)
+    for document_id, term, weight in SearchTerm.objects.filter(term__in=terms).values_list('document_id', 'term', 'weight'):
+        postings[document_id][term] = weight
+    frequencies = defaultdict(int)
+    for weights in postings.values():
+        for term in weights:
+            frequencies[term] += 1
+    total = SearchDocument.objects.count()
+
+    scores = sorted(
+        (-sum(weight * math.log(1 + total / frequencies[term]) for term, weight in weights.items()), document_id)
+        for document_id, weights in postings.items()
+        if len(weights) == len(terms)
+    )[offset:offset + limit]
+    documents = SearchDocument.objects.in_bulk([document_id for _, document_id in scores])
+    return [
+        {
+            'section': documents[document_id].section,
+            'object_id': documents[document_id].object_id,
+            'user_id': documents[document_id].user_id,
+            'rank': -score,
+        }
+        for score, document_id in scores
+    ]
+
+
+def search(query, offset=0, limit=20):
+    """
+    Rank the experience, project and education rows matching ``query``.
+
+    Uses the GIN-indexed tsvector on PostgreSQL and the inverted
+    ``SearchTerm`` index elsewhere. Returns up to ``limit`` results from
+    ``offset`` with the current representation of each row.
+    """
+    rank = _rank_postgres if uses_full_text_search() else _rank_inverted_index
+    hits = rank(query, offset, limit)
+
+    ids = defaultdict(list)
+    for hit in hits:
+        ids[hit['section']].append(hit['object_id'])
+    rows = {}
+    for section, object_ids in ids.items():
+        model = SECTION_MODELS[section]
+        serializer_class = SEARCH_FIELDS[model][1]
+        for row in model.objects.filter(pk__in=object_ids).values(*serializer_class.Meta.fields):
+            rows[section, row['id']] = represent_row(serializer_class, row)
+
+    return [
+        {'section': hit['section'], 'user': hit['user_id'], 'rank': hit['rank'], 'item': rows[hit['section'], hit['object_id']]}
+        for hit in hits
+        if (hit['section'], hit['object_id']) in rows
+    ]
@@ -1,6 +1,13 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField
+from django.utils import timezone
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_field
+from drf_spectacular.utils import PolymorphicProxySerializer, extend_schema_field
+from . import hashing
 from .models import PersonalInfo, Experience, Education, Project, Skill
+from .progress import progress_from_instances, progress_percentages
+from .provisioning import provision_resumes
 from django.contrib.auth.models import User
 
 
@@ -12,11 +19,16 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'password']
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
+        # Same as User.objects.create_user, with the hash computed on the
+        # bounded hashing pool
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
         )
+        user.password = hashing.make_password(validated_data['password'])
+        with transaction.atomic():
+            user.save()
+            provision_resumes([user.pk], new_users=True)
         return user
 
 
@@ -80,6 +92,55 @@ class APISchemaSerializer(serializers.Serializer):
     skills = serializers.CharField(read_only=True)
 
 
+class HashingPoolStatsSerializer(serializers.Serializer):
+    workers = serializers.IntegerField(read_only=True)
+    max_queue = serializers.IntegerField(read_only=True)
+    in_flight = serializers.IntegerField(read_only=True)
+    queue_depth = serializers.IntegerField(read_only=True)
+    completed = serializers.IntegerField(read_only=True)
+    rejected = serializers.IntegerField(read_only=True)
+    latency_seconds_sum = serializers.FloatField(read_only=True)
+    latency_seconds_buckets = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+
+class TaggedUserSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+
+
+class TaggedUserPageSerializer(serializers.Serializer):
+    next = serializers.URLField(read_only=True, allow_null=True)
+    results = TaggedUserSerializer(many=True, read_only=True)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    section = serializers.ChoiceField(choices=['experiences', 'projects', 'education'], read_only=True)
+    user = serializers.IntegerField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    item = PolymorphicProxySerializer(
+        component_name='SearchItem',
+        serializers=[ExperienceSerializer, ProjectSerializer, EducationSerializer],
+        resource_type_field_name=None,
+        many=False,
+        read_only=True,
+    )
+
+
+class SearchPageSerializer(serializers.Serializer):
+    next = serializers.URLField(read_only=True, allow_null=True)
+    results = SearchResultSerializer(many=True, read_only=True)
+
+
+# Schema of the ``progress`` block: 100 per section with a complete row, else 0
+PROGRESS_SCHEMA = {'type': 'object', 'properties': {
+    'personalInfo': {'type': 'integer'},
+    'experience': {'type': 'integer'},
+    'education': {'type': 'integer'},
+    'projects': {'type': 'integer'},
+    'skills': {'type': 'integer'},
+}}
+
+
 # Complete resume serializer for getting all user data at once
 class CompleteResumeSerializer(serializers.Serializer):
     personal_info = PersonalInfoSerializer(read_only=True)
@@ -89,61 +150,92 @@ class CompleteResumeSerializer(serializers.Serializer):
     skills = SkillSerializer(read_only=True)  # Remove many=True since it's OneToOneField
     progress = serializers.SerializerMethodField()
 
-    @extend_schema_field({'type': 'object', 'properties': {
-        'personalInfo': {'type': 'integer'},
-        'experience': {'type': 'integer'},
-        'education': {'type': 'integer'},
-        'projects': {'type': 'integer'},
-        'skills': {'type': 'integer'},
-    }})
+    @extend_schema_field(PROGRESS_SCHEMA)
     def get_progress(self, obj):
-        personal_info_progress = 0
-        if obj['personal_info'] and obj['personal_info'].full_name:
-            personal_info_progress = 100
-
-        # Handle experiences
-        experience_progress = 0
-        if obj['experiences']:
-            experience_progress = 100 if any(
-                exp.title and exp.title.strip() and 
-                exp.company and exp.company.strip() and 
-                exp.location and exp.location.strip() and 
-                exp.duration and exp.duration.strip() and 
-                exp.description and exp.description.strip() 
-                for exp in obj['experiences']
-            ) else 0
-
-        # Handle education
-        education_progress = 0
-        if obj['education']:
-            education_progress = 100 if any(
-                edu.degree and edu.degree.strip() and 
-                edu.institution and edu.institution.strip() and 
-                edu.education_duration and edu.education_duration.strip() and 
-                edu.education_location and edu.education_location.strip() 
-                for edu in obj['education']
-            ) else 0
-
-        # Handle projects
-        projects_progress = 0
-        if obj['projects']:
-            projects_progress = 100 if any(
-                proj.name and proj.name.strip() and 
-                proj.duration and proj.duration.strip() and 
-                proj.description and proj.description.strip() and 
-                proj.technologies and proj.technologies.strip() 
-                for proj in obj['projects']
-            ) else 0
-
-        # Handle skills - obj['skills'] is a single object, not a list
-        skills_progress = 0
-        if obj['skills'] and obj['skills'].skills and obj['skills'].skills.strip():
-            skills_progress = 100
-
-        return {
-            'personalInfo': personal_info_progress,
-            'experience': experience_progress,
-            'education': education_progress,
-            'projects': projects_progress,
-            'skills': skills_progress
-        }
\ No newline at end of file
+        if obj.get('progress') is not None:
+            return progress_percentages(obj['progress'])
+
+        # No stored progress for this user yet, derive it from the rows
+        return progress_from_instances({
+            PersonalInfo: [obj['personal_info']],
+            Experience: obj['experiences'],
+            Education: obj['education'],
+            Project: obj['projects'],
+            Skill: [obj['skills']],
+        })
+
+
+class ChangedRowsSerializer(serializers.Serializer):
+    personal_info = PersonalInfoSerializer(many=True, read_only=True)
+    experiences = ExperienceSerializer(many=True, read_only=True)
+    education = EducationSerializer(many=True, read_only=True)
+    projects = ProjectSerializer(many=True, read_only=True)
+    skills = SkillSerializer(many=True, read_only=True)
+
+
+class DeletedIdsSerializer(serializers.Serializer):
+    personal_info = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    experiences = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    education = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    projects = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    skills = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+
+class ResumeChangesSerializer(serializers.Serializer):
+    watermark = serializers.DateTimeField(read_only=True)
+    changed = ChangedRowsSerializer(read_only=True)
+    deleted = DeletedIdsSerializer(read_only=True)
+    progress = extend_schema_field(PROGRESS_SCHEMA)(serializers.DictField)(read_only=True)
+
+
+# Read-only fast path. Turns ``.values()`` rows straight into the
+# representation the serializers above produce, without building field
+# objects or model instances for every row.
+
+def datetime_representation(value):
+    """
+    Same output as ``serializers.DateTimeField`` with the default ISO 8601 format.
+    """
+    if not value:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+_row_converters = {}
+
+
+def _converters(serializer_class, fields=None):
+    if serializer_class not in _row_converters:
+        model = serializer_class.Meta.model
+        _row_converters[serializer_class] = [
+            (field, datetime_representation if isinstance(model._meta.get_field(field), DateTimeField) else None)
+            for field in serializer_class.Meta.fields
+        ]
+    if fields is None:
+        return _row_converters[serializer_class]
+    return [(field, convert) for field, convert in _row_converters[serializer_class] if field in fields]
+
+
+def _represent(row, converters):
+    return {
+        field: row[field] if convert is None or row[field] is None else convert(row[field])
+        for field, convert in converters
+    }
+
+
+def represent_row(serializer_class, row, fields=None):
+    """
+    Representation of one ``.values(*serializer_class.Meta.fields)`` row,
+    limited to ``fields`` when given.
+    """
+    return _represent(row, _converters(serializer_class, fields))
+
+
+def represent_rows(serializer_class, rows, fields=None):
+    converters = _converters(serializer_class, fields)
+    return [_represent(row, converters) for row in rows]
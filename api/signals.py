@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user_state, revoke_user_tokens
+from .models import PersonalInfo, Experience, Education, Project, Skill
+from .resume import invalidate_resume
+from .search import SEARCH_FIELDS, index_rows, unindex_rows
+from .tags import TAG_FIELDS, sync_tags
+
+RESUME_MODELS = (PersonalInfo, Experience, Education, Project, Skill)
+
+
+def invalidate_cached_resume(sender, instance, **kwargs):
+    invalidate_resume(instance.user_id)
+
+
+for model in RESUME_MODELS:
+    post_save.connect(invalidate_cached_resume, sender=model)
+    post_delete.connect(invalidate_cached_resume, sender=model)
+
+
+def sync_saved_tags(sender, instance, update_fields=None, **kwargs):
+    text_field, _ = TAG_FIELDS[sender]
+    if update_fields is None or text_field in update_fields:
+        sync_tags([instance])
+
+
+for model in TAG_FIELDS:
+    post_save.connect(sync_saved_tags, sender=model)
+
+
+def index_saved_row(sender, instance, **kwargs):
+    index_rows([instance])
+
+
+def unindex_deleted_row(sender, instance, **kwargs):
+    unindex_rows(sender, [instance.pk])
+
+
+for model in SEARCH_FIELDS:
+    post_save.connect(index_saved_row, sender=model)
+    post_delete.connect(unindex_deleted_row, sender=model)
+
+
+@receiver(post_save, sender=get_user_model())
+def refresh_token_user_state(sender, instance, **kwargs):
+    if instance.is_active:
+        forget_user_state(instance.pk)
+    else:
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Tombstone
+from .resume import RESUME_SECTIONS, get_resume_selection, render_changed_rows
+from .serializers import datetime_representation
+
+
+# Model -> section name in the resume representation
+SECTION_NAMES = {serializer_class.Meta.model: section for section, serializer_class in RESUME_SECTIONS.items()}
+
+
+class WatermarkExpired(Exception):
+    """The watermark predates the retained tombstones; the client must resync in full."""
+
+
+def record_deletions(user, model, pks):
+    """
+    Leave tombstones for deleted rows of ``model`` so clients syncing
+    deltas learn about the deletions. Call in the deleting transaction.
+    """
+    if pks:
+        Tombstone.objects.bulk_create([
+            Tombstone(user=user, section=SECTION_NAMES[model], object_id=pk) for pk in pks
+        ])
+
+
+def get_changes(user, since=None):
+    """
+    Section rows of ``user`` created or updated after the ``since``
+    watermark, ids deleted after it, the current progress and the
+    watermark for the next call. Without ``since`` every row is returned.
+
+    A row's ``updated_at`` is taken before its transaction commits, so the
+    window reaches ``SYNC_WATERMARK_OVERLAP`` seconds before ``since`` and
+    recent changes may be sent twice; clients apply them as upserts.
+    """
+    watermark = timezone.now()
+    if since is not None:
+        if since < watermark - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise WatermarkExpired
+        since -= timedelta(seconds=settings.SYNC_WATERMARK_OVERLAP)
+
+    deleted = defaultdict(list)
+    if since is not None:
+        tombstones = Tombstone.objects.filter(user=user, deleted_at__gt=since).order_by('deleted_at', 'pk')
+        for section, object_id in tombstones.values_list('section', 'object_id'):
+            deleted[section].append(object_id)
+
+    progress, _ = get_resume_selection(user, ['progress'])
+    return {
+        'watermark': datetime_representation(watermark),
+        'changed': render_changed_rows(user, since),
+        'deleted': {section: deleted[section] for section in RESUME_SECTIONS},
+        'progress': progress['progress'],
+    }
+
+
+def prune_tombstones():
+    """
+    Delete tombstones older than any watermark ``get_changes`` still accepts.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -0,0 +1,79 @@
+import re
+
+from django.db import transaction
+
+from .models import Project, Skill
+
+
+# Model -> (comma-separated text field, many-to-many field holding its terms)
+TAG_FIELDS = {
+    Skill: ('skills', 'tags'),
+    Project: ('technologies', 'technology_tags'),
+}
+
+# Longer entries are prose rather than a skill or technology and are not tagged
+MAX_TAG_LENGTH = 100
+
+
+def _clean(name):
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def normalize_tag(name):
+    return _clean(name).casefold()
+
+
+def split_tags(text):
+    """
+    The distinct entries of a comma-separated string as a mapping of
+    normalized name -> name as first written.
+    """
+    tags = {}
+    for name in (text or '').split(','):
+        name = _clean(name)
+        normalized_name = name.casefold()
+        if normalized_name and len(normalized_name) <= MAX_TAG_LENGTH:
+            tags.setdefault(normalized_name, name)
+    return tags
+
+
+def sync_tag_links(instances, text_field, m2m_field):
+    """
+    Point the ``m2m_field`` links of ``instances`` at the tags parsed from
+    their ``text_field``, creating missing tags.
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return
+    field = type(instances[0])._meta.get_field(m2m_field)
+    tag_model = field.related_model
+    through = field.remote_field.through
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+
+    links = {instance.pk: split_tags(getattr(instance, text_field)) for instance in instances}
+    names = {}
+    for tags in links.values():
+        for normalized_name, name in tags.items():
+            names.setdefault(normalized_name, name)
+
+    with transaction.atomic():
+        tag_model.objects.bulk_create(
+            [tag_model(name=name, normalized_name=normalized_name) for normalized_name, name in names.items()],
+            ignore_conflicts=True,
+        )
+        tag_ids = dict(tag_model.objects.filter(normalized_name__in=names).values_list('normalized_name', 'pk'))
+        through.objects.filter(**{f'{source}__in': list(links)}).delete()
+        through.objects.bulk_create([
+            through(**{f'{source}_id': pk, f'{target}_id': tag_ids[normalized_name]})
+            for pk, tags in links.items()
+            for normalized_name in tags
+        ])
+
+
+def sync_tags(instances):
+    """
+    Sync the tag links of ``Skill`` or ``Project`` rows with their text.
+    """
+    instances = list(instances)
+    if instances:
+        sync_tag_links(instances, *TAG_FIELDS[type(instances[0])])
@@ -1,3 +1,1281 @@
-from django.test import TestCase
+import importlib.util
+import io
+import json
+import os
+import runpy
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.utils import ConnectionHandler
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.generators import SchemaGenerator
+from prometheus_client import REGISTRY
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import hashing, urls
+from .batch import apply_section_batch
+from .authentication import StatelessJWTAuthentication, revoke_user_tokens
+from .management.commands import check_query_plans
+from .middleware import LeanSessionMiddleware, is_lean_api_request
+from .models import (
+    PersonalInfo, Experience, Education, Project, Skill, ResumeProgress, SearchDocument, SearchTerm, SkillTag,
+    TechnologyTag, Tombstone,
+)
+from .progress import recompute_progress
+from .provisioning import provision_resumes
+from .renderers import FastJSONRenderer
+from .resume import RESUME_PARTS, render_resume, render_resumes, select_resume
+from .search import search
+from .throttling import take_token
+from .views import ExperienceDetailView
+from .serializers import (
+    CompleteResumeSerializer, EducationSerializer, ExperienceSerializer, ProjectSerializer,
+    represent_rows
+)
+
+
+class UnionResumeTests(TestCase):
+    """
+    The single UNION ALL read must produce what the serializers would.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('union', 'union@example.com', 'secret')
+        other = User.objects.create_user('other', 'other@example.com', 'secret')
+        PersonalInfo.objects.create(user=self.user, full_name='Union')
+        Skill.objects.create(user=self.user, skills='Python')
+        for user in (self.user, other):
+            for index in range(4):
+                Experience.objects.create(user=user, title=f'Experience {index}')
+                Education.objects.create(user=user, degree=f'Degree {index}')
+                Project.objects.create(user=user, name=f'Project {index}')
+        # Ties on created_at fall back to -id
+        Experience.objects.filter(user=self.user, title__in=['Experience 1', 'Experience 2']).update(
+            created_at=Experience.objects.get(user=self.user, title='Experience 0').created_at,
+        )
+        recompute_progress([self.user.pk])
+
+    def test_matches_serializers_in_order(self):
+        with self.assertNumQueries(1):
+            resume = render_resume(self.user)
+        expected = CompleteResumeSerializer(instance={
+            'personal_info': PersonalInfo.objects.get(user=self.user),
+            'experiences': Experience.objects.filter(user=self.user),
+            'education': Education.objects.filter(user=self.user),
+            'projects': Project.objects.filter(user=self.user),
+            'skills': Skill.objects.get(user=self.user),
+            'progress': ResumeProgress.objects.get(user=self.user),
+        }).data
+        self.assertEqual(JSONRenderer().render(resume), JSONRenderer().render(expected))
+        self.assertEqual(
+            [row['title'] for row in resume['experiences']],
+            ['Experience 3', 'Experience 2', 'Experience 1', 'Experience 0'],
+        )
+
+
+class ResumeCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached', 'cached@example.com', 'secret')
+        self.experience = Experience.objects.create(user=self.user, title='Engineer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get('/api/resume/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/resume/')['ETag'], response['ETag'])
+        with self.assertNumQueries(0):
+            not_modified = self.client.get('/api/resume/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+    def test_invalidated_when_write_commits(self):
+        etag = self.client.get('/api/resume/')['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(f'/api/experience/{self.experience.pk}/', {'title': 'Lead'})
+            # Until the write commits, the cached resume is still served
+            self.assertEqual(self.client.get('/api/resume/')['ETag'], etag)
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get('/api/resume/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['experiences'][0]['title'], 'Lead')
+
+
+class ProgressTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('progress', 'progress@example.com', 'secret')
+        recompute_progress([self.user.pk])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def counters(self):
+        return ResumeProgress.objects.values('experience', 'projects').get(user=self.user)
+
+    def test_counters_follow_writes(self):
+        complete = {'title': 'Engineer', 'company': 'ACME', 'location': 'Remote', 'duration': '2020', 'description': 'Built'}
+        first = self.client.post('/api/experience/', complete).json()
+        self.client.post('/api/experience/', {'title': 'Draft'})
+        self.assertEqual(self.counters(), {'experience': 1, 'projects': 0})
+
+        self.client.patch(f'/api/experience/{first["id"]}/', {'company': ' '})
+        self.assertEqual(self.counters()['experience'], 0)
+        self.client.patch(f'/api/experience/{first["id"]}/', {'company': 'ACME'})
+        self.assertEqual(self.counters()['experience'], 1)
+
+        self.client.delete(f'/api/experience/{first["id"]}/')
+        self.assertEqual(self.counters()['experience'], 0)
+        self.assertEqual(self.client.get('/api/resume/').json()['progress']['experience'], 0)
+
+    def test_progress_commits_with_the_row(self):
+        experience = Experience.objects.create(user=self.user, title='Engineer')
+        with mock.patch('api.views.record_progress', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.patch(f'/api/experience/{experience.pk}/', {'company': 'ACME'})
+        self.assertEqual(Experience.objects.get(pk=experience.pk).company, '')
+
+    def test_concurrent_writes(self):
+        row = Experience.objects.create(user=self.user, title='Engineer', location='Remote', duration='2020', description='Built')
+        stale = Experience.objects.get(pk=row.pk)
+        Experience.objects.filter(pk=row.pk).update(company='ACME')
+        recompute_progress([self.user.pk])
+        with mock.patch.object(ExperienceDetailView, 'get_object', return_value=stale):
+            # The stale copy has no company, but the row it updates was already complete
+            self.assertEqual(self.client.patch(f'/api/experience/{row.pk}/', {'company': 'Initech'}).status_code, 200)
+            self.assertEqual(self.counters()['experience'], 1)
+
+            self.assertEqual(self.client.delete(f'/api/experience/{row.pk}/').status_code, 204)
+            # A second delete that read the row before the first one committed
+            self.assertEqual(self.client.delete(f'/api/experience/{row.pk}/').status_code, 404)
+            self.assertEqual(self.client.patch(f'/api/experience/{row.pk}/', {'title': 'Gone'}).status_code, 404)
+        self.assertEqual(self.counters()['experience'], 0)
+        self.assertEqual(Tombstone.objects.filter(user=self.user, object_id=row.pk).count(), 1)
+
+    def test_backfill_progress(self):
+        Project.objects.create(user=self.user, name='Pave', duration='2024', description='Resumes', technologies='Django')
+        ResumeProgress.objects.all().delete()
+        call_command('backfill_progress', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(self.counters(), {'experience': 0, 'projects': 1})
+        with self.assertRaisesMessage(CommandError, '--batch-size must be positive'):
+            call_command('backfill_progress', batch_size=0, stdout=io.StringIO())
+
+
+class SectionBatchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('batcher', 'batcher@example.com', 'secret')
+        self.experience = Experience.objects.create(user=self.user, title='Engineer')
+        self.foreign = Experience.objects.create(user=User.objects.create_user('foreign'), title='Theirs')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, payload):
+        return self.client.post('/api/experience/batch/', payload, format='json')
+
+    def test_applies_creates_updates_and_deletes(self):
+        removed = Experience.objects.create(user=self.user, title='Removed')
+        response = self.batch({
+            'create': [{'title': 'New'}],
+            'update': [{'id': self.experience.pk, 'company': 'ACME'}],
+            'delete': [removed.pk],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.json()], ['New', 'Engineer'])
+        self.assertEqual(Experience.objects.get(pk=self.experience.pk).company, 'ACME')
+        self.assertFalse(Experience.objects.filter(pk=removed.pk).exists())
+
+    def test_validation_errors(self):
+        invalid = [
+            {'update': [{'id': self.foreign.pk, 'title': 'Mine'}]},
+            {'update': [{'title': 'No id'}]},
+            {'update': [{'id': self.experience.pk}, {'id': self.experience.pk}]},
+            {'update': [{'id': self.experience.pk}], 'delete': [self.experience.pk]},
+            {'delete': [self.experience.pk, self.experience.pk]},
+            {'create': [{}] * 501},
+        ]
+        for payload in invalid:
+            with self.subTest(payload=str(payload)[:60]):
+                self.assertEqual(self.batch(payload).status_code, 400)
+        response = self.batch({'update': [{'id': self.experience.pk, 'title': 'x' * 101}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json()['update'][0])
+
+    def test_duplicate_delete(self):
+        complete = {'title': 'Engineer', 'company': 'ACME', 'location': 'Remote', 'duration': '2020', 'description': 'Built'}
+        row = Experience.objects.create(user=self.user, **complete)
+        Experience.objects.create(user=self.user, **complete)
+        recompute_progress([self.user.pk])
+        response = self.batch({'delete': [row.pk, row.pk]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('delete', response.json())
+        self.assertEqual(ResumeProgress.objects.get(user=self.user).experience, 2)
+
+        with transaction.atomic():
+            apply_section_batch(self.user, Experience, [], [], [row, Experience.objects.get(pk=row.pk)])
+        self.assertEqual(ResumeProgress.objects.get(user=self.user).experience, 1)
+        self.assertEqual(Tombstone.objects.filter(user=self.user).count(), 1)
+
+    def test_all_or_nothing(self):
+        response = self.batch({
+            'create': [{'title': 'New'}],
+            'update': [{'id': self.experience.pk, 'duration': 'x' * 51}],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(Experience.objects.filter(user=self.user).values_list('title', flat=True)), ['Engineer'])
+
+        with mock.patch('api.batch.record_progress_delta', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.batch({'create': [{'title': 'New'}], 'delete': [self.experience.pk]})
+        self.assertEqual(list(Experience.objects.filter(user=self.user).values_list('title', flat=True)), ['Engineer'])
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('pager', 'pager@example.com', 'secret')
+        for index in range(7):
+            Project.objects.create(user=self.user, name=f'Project {index}')
+        # Five rows tie on created_at, so pages must break ties on id
+        tied = Project.objects.filter(user=self.user).order_by('pk')[1:6]
+        Project.objects.filter(pk__in=[row.pk for row in tied]).update(created_at=tied[0].created_at)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            ids += [row['id'] for row in page['results']]
+            url = page['next']
+            if len(ids) == 2:
+                # Rows added while paging are newer and must not shift later pages
+                Project.objects.create(user=self.user, name='Added')
+        return ids
+
+    def test_pages_follow_ordering(self):
+        expected = list(Project.objects.filter(user=self.user).values_list('pk', flat=True))
+        self.assertEqual(len(self.client.get('/api/projects/').json()), 7)
+        self.assertEqual(self.walk('/api/projects/?limit=2'), expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/projects/?cursor=bm90LWEtY3Vyc29y').status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_check_query_plans(self):
+        with self.assertRaisesMessage(CommandError, 'No user has'):
+            call_command('check_query_plans', stdout=io.StringIO())
+
+        user = User.objects.create_user('planned')
+        Experience.objects.create(user=user, title='Engineer')
+        Education.objects.create(user=user, degree='BSc')
+        with self.assertRaisesMessage(CommandError, 'no projects rows'):
+            call_command('check_query_plans', user_id=user.pk, stdout=io.StringIO())
+
+        project = Project.objects.create(user=user, name='Pave')
+        out = io.StringIO()
+        call_command('check_query_plans', report_only=True, stdout=out)
+        self.assertIn('complete-resume:', out.getvalue())
+        self.assertIn('projects-detail:', out.getvalue())
+        self.assertIn(str(project.pk), str(check_query_plans.view_querysets(user)['projects-detail'].query))
+
+
+class StatelessJWTTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('stateless', 'stateless@example.com', 'secret')
+        self.client = APIClient()
+
+    def get(self, token):
+        return self.client.get('/api/experience/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_row_read_once_per_ttl(self):
+        token = AccessToken.for_user(self.user)
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        authenticator = StatelessJWTAuthentication()
+        with self.assertNumQueries(1):
+            authenticator.authenticate(request)
+        with self.assertNumQueries(0):
+            user, _ = authenticator.authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_active)
+
+    def test_revoked_tokens_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.get(token).status_code, 200)
+        revoke_user_tokens(self.user.pk)
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_inactive_and_deleted_users_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.get(token).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(token).status_code, 401)
+
+        other = User.objects.create_user('deleted')
+        token = AccessToken.for_user(other)
+        other.delete()
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_schema_declares_bearer_scheme(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertEqual(
+            schema['components']['securitySchemes']['jwtAuth'],
+            {'type': 'http', 'scheme': 'bearer', 'bearerFormat': 'JWT'},
+        )
+        self.assertIn({'jwtAuth': []}, schema['paths']['/api/resume/']['get']['security'])
+
+
+class SchemaTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        GENERATOR_STATS.reset()
+        cls.schema = SchemaGenerator().get_schema(request=None, public=True)
+
+    def test_generates_cleanly(self):
+        self.assertFalse(GENERATOR_STATS)
+
+    def response_component(self, path, status='200'):
+        schema = self.schema['paths'][path]['get']['responses'][status]['content']['application/json']['schema']
+        return self.schema['components']['schemas'][schema['$ref'].rsplit('/', 1)[1]]
+
+    def test_function_views_document_responses(self):
+        self.assertIn('queue_depth', self.response_component('/api/metrics/hashing/')['properties'])
+        self.assertEqual(list(self.response_component('/api/users/by-tag/')['properties']), ['next', 'results'])
+        self.assertEqual(list(self.response_component('/api/search/')['properties']), ['next', 'results'])
+        self.assertEqual(len(self.schema['components']['schemas']['SearchItem']['oneOf']), 3)
+        changes = self.response_component('/api/resume/changes/')['properties']
+        self.assertEqual(list(changes), ['watermark', 'changed', 'deleted', 'progress'])
+        self.assertIn('personalInfo', changes['progress']['properties'])
+
+
+class LeanProfileTests(TestCase):
+
+    def process(self, path, **headers):
+        request = RequestFactory().get(path, **headers)
+        LeanSessionMiddleware(lambda request: HttpResponse())(request)
+        return request
+
+    def test_skipped_only_for_token_requests_under_api(self):
+        bearer = {'HTTP_AUTHORIZATION': 'Bearer token'}
+        self.assertTrue(is_lean_api_request(RequestFactory().get('/api/resume/', **bearer)))
+        self.assertFalse(hasattr(self.process('/api/resume/', **bearer), 'session'))
+        self.assertTrue(hasattr(self.process('/api/resume/'), 'session'))
+        self.assertTrue(hasattr(self.process('/admin/', **bearer), 'session'))
+        with self.settings(API_LEAN_PROFILE=False):
+            self.assertTrue(hasattr(self.process('/api/resume/', **bearer), 'session'))
+
+    def test_csrf_still_enforced_for_session_requests(self):
+        user = User.objects.create_user('lean', 'lean@example.com', 'secret')
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(user)
+        self.assertEqual(client.post('/api/experience/', {'title': 'Engineer'}).status_code, 403)
+
+        token = AccessToken.for_user(user)
+        response = client.post('/api/experience/', {'title': 'Engineer'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 201)
+
+    def test_benchmark_is_not_throttled(self):
+        cache.clear()
+        stderr = io.StringIO()
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'read': '1/min'}}):
+            call_command('benchmark_api_profile', requests=3, stdout=io.StringIO(), stderr=stderr)
+        self.assertEqual(stderr.getvalue(), '')
+
+
+class AsyncEndpointTests(TransactionTestCase):
+    """
+    Runs outside a test transaction: the async resume reads each section on
+    its own connection.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('async', 'async@example.com', 'secret')
+        PersonalInfo.objects.create(user=self.user, full_name='Async')
+        Skill.objects.create(user=self.user, skills='Python')
+        for index in range(3):
+            Experience.objects.create(user=self.user, title=f'Engineer {index}')
+            Education.objects.create(user=self.user, degree=f'Degree {index}')
+            Project.objects.create(user=self.user, name=f'Project {index}')
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_same_payload_as_sync_endpoints(self):
+        for path in ('resume/', 'experience/', 'education/', 'projects/'):
+            with self.subTest(path=path):
+                cache.clear()
+                asynchronous = self.client.get(f'/api/async/{path}')
+                cache.clear()
+                synchronous = self.client.get(f'/api/{path}')
+                self.assertEqual(asynchronous.status_code, 200)
+                self.assertEqual(asynchronous.json(), synchronous.json())
+        self.assertEqual(Client().get('/api/async/resume/').status_code, 401)
+
+
+def load_settings(**environ):
+    """
+    ``backend/settings.py`` evaluated afresh under extra environment variables.
+    """
+    with mock.patch.dict(os.environ, environ):
+        return runpy.run_path(os.path.join(settings.BASE_DIR, 'backend', 'settings.py'))
+
+
+class ConnectionSettingsTests(SimpleTestCase):
+
+    def test_persistent_connections(self):
+        database = load_settings(DB_CONN_MAX_AGE='30', DB_CONN_HEALTH_CHECKS='false')['DATABASES']['default']
+        self.assertEqual(database['CONN_MAX_AGE'], 30)
+        self.assertFalse(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', database['OPTIONS'])
+
+    def test_pool_requires_psycopg_pool(self):
+        with mock.patch.dict(sys.modules, {'psycopg_pool': None}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'psycopg[binary,pool]'):
+                load_settings(DB_POOL='true')
+
+    @skipUnless(importlib.util.find_spec('psycopg_pool'), 'psycopg_pool is not installed')
+    def test_pool(self):
+        database = load_settings(DB_POOL='true', DB_NAME='pave', DB_POOL_MAX_SIZE='4')['DATABASES']['default']
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        wrapper = ConnectionHandler({'default': database})['default']
+        try:
+            pool = wrapper.pool
+            self.assertEqual(pool.max_size, 4)
+            if os.environ.get('DB_HOST'):
+                # With a PostgreSQL server configured, check out a real connection
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    self.assertEqual(cursor.fetchone(), (1,))
+                wrapper.close()
+        finally:
+            wrapper.close_pool()
+
+
+class FastSerializationTests(TestCase):
+    """
+    The read-only fast path must render exactly the bytes the serializers do.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'secret')
+        PersonalInfo.objects.create(user=self.user, full_name='Zoë Ångström', email=None)
+        for index in range(3):
+            Experience.objects.create(
+                user=self.user, title=f'Engineer {index}', company='ACME "Labs"',
+                location='Zürich', duration='2020 - 2022', description='• Built\u2028\n\t• Shipped',
+            )
+        Experience.objects.create(user=self.user, title='   ')
+        Education.objects.create(user=self.user, degree='BSc', institution='ETH', education_duration='')
+        Project.objects.create(user=self.user, name='Pave', technologies='Python, Django ')
+        Skill.objects.create(user=self.user, skills='Python, 日本語')
+
+    def reference_resume(self, user):
+        return JSONRenderer().render(CompleteResumeSerializer(instance={
+            'personal_info': PersonalInfo.objects.filter(user=user).first(),
+            'experiences': Experience.objects.filter(user=user),
+            'education': Education.objects.filter(user=user),
+            'projects': Project.objects.filter(user=user),
+            'skills': Skill.objects.filter(user=user).first(),
+        }).data)
+
+    def test_resume_without_stored_progress(self):
+        self.assertEqual(FastJSONRenderer().render(render_resume(self.user)), self.reference_resume(self.user))
+
+    def test_resume_with_stored_progress(self):
+        recompute_progress([self.user.pk])
+        self.assertEqual(FastJSONRenderer().render(render_resume(self.user)), self.reference_resume(self.user))
+
+    def test_empty_resume(self):
+        user = User.objects.create_user('empty', 'empty@example.com', 'secret')
+        self.assertEqual(FastJSONRenderer().render(render_resume(user)), self.reference_resume(user))
+
+    def test_section_lists(self):
+        for serializer_class in (ExperienceSerializer, EducationSerializer, ProjectSerializer):
+            rows = serializer_class.Meta.model.objects.filter(user=self.user)
+            self.assertEqual(
+                FastJSONRenderer().render(represent_rows(serializer_class, rows.values(*serializer_class.Meta.fields))),
+                JSONRenderer().render(serializer_class(rows, many=True).data),
+            )
+
+    def test_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/resume/').content, self.reference_resume(self.user))
+        self.assertEqual(
+            client.get('/api/experience/').content,
+            JSONRenderer().render(ExperienceSerializer(Experience.objects.filter(user=self.user), many=True).data),
+        )
+
+
+class HashingPoolTests(TestCase):
+
+    def test_full_pool_answers_503(self):
+        pool = hashing.HashingPool(workers=1, max_queue=1, retry_after=3)
+        release = threading.Event()
+        waiting = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)]
+        with mock.patch.object(hashing, 'pool', pool):
+            for thread in waiting:
+                thread.start()
+            try:
+                while pool.in_flight < 2:
+                    time.sleep(0.01)
+                credentials = {'username': 'burst', 'password': 'secret-Pa55'}
+                response = APIClient().post('/api/login/', credentials)
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], '3')
+                self.assertEqual(APIClient().post('/api/register/', {**credentials, 'email': ''}).status_code, 503)
+            finally:
+                release.set()
+                for thread in waiting:
+                    thread.join()
+            self.assertEqual(pool.stats()['rejected'], 2)
+            User.objects.create_user('burst', password='secret-Pa55')
+            self.assertEqual(APIClient().post('/api/login/', credentials).status_code, 200)
+
+
+class RenderedResumeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('printer', 'printer@example.com', 'secret')
+        PersonalInfo.objects.create(user=self.user, full_name='Zoë (Printer)')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_formats(self):
+        html = self.client.get('/api/resume/render/html/')
+        self.assertEqual(html['Content-Type'], 'text/html; charset=utf-8')
+        self.assertIn('Zoë (Printer)', html.content.decode())
+        pdf = self.client.get('/api/resume/render/pdf/')
+        self.assertEqual(pdf['Content-Type'], 'application/pdf')
+        self.assertTrue(pdf.content.startswith(b'%PDF-'))
+        self.assertIn(b'(Zo\xeb \\(Printer\\)) Tj', pdf.content)
+        self.assertEqual(self.client.get('/api/resume/render/doc/').status_code, 404)
+
+    def test_artifact_follows_content(self):
+        first = self.client.get('/api/resume/render/pdf/')
+        self.assertEqual(self.client.get('/api/resume/render/pdf/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(user=self.user, skills='Typesetting')
+        second = self.client.get('/api/resume/render/pdf/')
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertIn(b'(Typesetting) Tj', second.content)
+
+    def test_accept_headers(self):
+        html = self.client.get('/api/resume/render/html/', HTTP_ACCEPT='text/html')
+        self.assertEqual(html.status_code, 200)
+        self.assertEqual(html['Content-Type'], 'text/html; charset=utf-8')
+        pdf = self.client.get('/api/resume/render/pdf/', HTTP_ACCEPT='application/pdf')
+        self.assertEqual(pdf.status_code, 200)
+        self.assertEqual(pdf['Content-Type'], 'application/pdf')
+        self.assertTrue(pdf.content.startswith(b'%PDF-'))
+        missing = self.client.get('/api/resume/render/doc/', HTTP_ACCEPT='application/pdf')
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing['Content-Type'], 'text/plain; charset=utf-8')
+
+    def test_non_latin_text(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(user=self.user, skills='日本語, Русский')
+        html = self.client.get('/api/resume/render/html/')
+        self.assertIn('日本語, Русский', html.content.decode())
+        pdf = self.client.get('/api/resume/render/pdf/', HTTP_ACCEPT='application/pdf')
+        self.assertEqual(pdf.status_code, 422)
+        self.assertIn('本', pdf.content.decode())
+        self.assertIn('/api/resume/render/html/', pdf.content.decode())
+        response = self.client.get('/api/resume/render/pdf/')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()['detail'], pdf.content.decode())
+
+
+class ExportResumesTests(TestCase):
+
+    def setUp(self):
+        for index in range(5):
+            user = User.objects.create_user(f'export{index}', f'export{index}@example.com', 'secret')
+            PersonalInfo.objects.create(user=user, full_name=f'Export {index}')
+            for _ in range(index):
+                Experience.objects.create(user=user, title='Engineer', company='ACME')
+        recompute_progress([User.objects.order_by('pk').first().pk])
+
+    def export(self, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'resumes.ndjson')
+            call_command('export_resumes', output=path, stderr=io.StringIO(), **options)
+            with open(path, 'rb') as output:
+                return output.read().splitlines()
+
+    def test_lines_match_resume(self):
+        users = User.objects.order_by('pk')
+        self.assertEqual(render_resumes([user.pk for user in users]), {user.pk: render_resume(user) for user in users})
+        self.assertEqual(self.export(batch_size=2), [
+            FastJSONRenderer().render({
+                'user': {'id': user.pk, 'username': user.username, 'email': user.email},
+                'resume': render_resume(user),
+            })
+            for user in users
+        ])
+
+    def test_shards_cover_every_user(self):
+        exported = [
+            json.loads(line)['user']['id']
+            for shard in range(3)
+            for line in self.export(shard=shard, shards=3)
+        ]
+        self.assertEqual(exported, list(User.objects.order_by('pk').values_list('pk', flat=True)))
+
+    def test_rejects_empty_batches(self):
+        for batch_size in (0, -1):
+            with self.subTest(batch_size=batch_size), self.assertRaisesMessage(CommandError, '--batch-size must be positive'):
+                self.export(batch_size=batch_size)
+
+
+class ImportResumesTests(TestCase):
+
+    def write_lines(self, directory, lines):
+        path = os.path.join(directory, 'resumes.jsonl')
+        with open(path, 'w') as source:
+            source.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_import_and_resume_from_checkpoint(self):
+        User.objects.create_user('taken', 'taken@example.com', 'secret')
+        lines = [
+            json.dumps({'user': {'username': f'imported{index}', 'email': f'imported{index}@example.com'}, 'resume': {
+                'personal_info': {'full_name': f'Imported {index}'},
+                'experiences': [{'title': 'Newest'}, {'title': 'Oldest'}],
+                'skills': {'skills': 'Python'},
+                'progress': {'personalInfo': 0},
+            }})
+            for index in range(5)
+        ]
+        lines += ['{not json', json.dumps({'user': {'username': 'taken'}, 'resume': {}})]
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_lines(directory, lines)
+            checkpoint = os.path.join(directory, 'checkpoint')
+            errors = io.StringIO()
+            call_command('import_resumes', path, batch_size=2, checkpoint=checkpoint,
+                         stdout=io.StringIO(), stderr=errors)
+            self.assertIn('line 6:', errors.getvalue())
+            self.assertIn('line 7:', errors.getvalue())
+            with open(checkpoint) as stored:
+                self.assertEqual(stored.read(), '7\n')
+            call_command('import_resumes', path, checkpoint=checkpoint, stdout=io.StringIO())
+
+        self.assertEqual(User.objects.filter(username__startswith='imported').count(), 5)
+        user = User.objects.get(username='imported0')
+        self.assertFalse(user.has_usable_password())
+        resume = render_resume(user)
+        self.assertEqual([experience['title'] for experience in resume['experiences']], ['Newest', 'Oldest'])
+        self.assertEqual(resume['progress']['personalInfo'], 100)
+        self.assertEqual(ResumeProgress.objects.get(user=user).skills, 1)
+
+
+class TagTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.users = [User.objects.create_user(f'tagged{index}') for index in range(3)]
+
+    def lookup(self, **params):
+        response = self.client.get('/api/users/by-tag/', params)
+        self.assertEqual(response.status_code, 200)
+        return [user['username'] for user in response.data['results']]
+
+    def test_tags_follow_text(self):
+        skill = Skill.objects.create(user=self.users[0], skills='Python,  python , Django REST,')
+        self.assertEqual(sorted(skill.tags.values_list('name', flat=True)), ['Django REST', 'Python'])
+        skill.skills = 'Go'
+        skill.save()
+        self.assertEqual(list(skill.tags.values_list('name', flat=True)), ['Go'])
+        self.assertEqual(SkillTag.objects.count(), 3)
+
+    def test_lookup(self):
+        Skill.objects.create(user=self.users[0], skills='Python')
+        Skill.objects.create(user=self.users[2], skills='Go, PYTHON')
+        Project.objects.create(user=self.users[1], technologies='Django, Python')
+        self.client.force_authenticate(self.users[1])
+        self.client.post('/api/projects/batch/', {'create': [{'technologies': 'django'}]}, format='json')
+        self.client.force_authenticate(self.admin)
+
+        self.assertEqual(self.lookup(skill=' python'), ['tagged0', 'tagged2'])
+        self.assertEqual(self.lookup(technology='DJANGO'), ['tagged1'])
+        page = self.client.get('/api/users/by-tag/', {'skill': 'python', 'limit': 1}).data
+        self.assertEqual([user['username'] for user in page['results']], ['tagged0'])
+        self.assertEqual([user['username'] for user in self.client.get(page['next']).data['results']], ['tagged2'])
+        self.assertEqual(self.client.get('/api/users/by-tag/').status_code, 400)
+
+    def test_migration_backfill(self):
+        skill = Skill.objects.create(user=self.users[0], skills='Python,  python , Django REST,')
+        project = Project.objects.create(user=self.users[1], technologies='Django, Python')
+        Skill.tags.through.objects.all().delete()
+        Project.technology_tags.through.objects.all().delete()
+        SkillTag.objects.all().delete()
+        TechnologyTag.objects.all().delete()
+
+        migration = 'api', '0009_skill_and_technology_tags'
+        loader = MigrationLoader(connection)
+        module = sys.modules[type(loader.get_migration(*migration)).__module__]
+        module.backfill_tags(loader.project_state(migration).apps, None)
+        self.assertEqual(sorted(skill.tags.values_list('name', flat=True)), ['Django REST', 'Python'])
+        self.assertEqual(sorted(project.technology_tags.values_list('name', flat=True)), ['Django', 'Python'])
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.users = [User.objects.create_user(f'searched{index}') for index in range(2)]
+        self.backend = Experience.objects.create(
+            user=self.users[0], title='Backend Engineer', company='ACME', description='Built Django APIs',
+        )
+        self.frontend = Experience.objects.create(user=self.users[1], title='Frontend Engineer', description='Django templates')
+        self.project = Project.objects.create(user=self.users[1], name='Pave', technologies='Django, React')
+        Education.objects.create(user=self.users[0], degree='BSc Computer Science', institution='ETH')
+
+    def items(self, query, **kwargs):
+        return [(result['section'], result['item']['id']) for result in search(query, **kwargs)]
+
+    def test_ranking_follows_field_weights(self):
+        self.assertEqual(self.items('engineer'), [('experiences', self.backend.pk), ('experiences', self.frontend.pk)])
+        # A technology outranks a description mention
+        self.assertEqual(self.items('django')[0], ('projects', self.project.pk))
+        self.assertEqual(self.items('django backend'), [('experiences', self.backend.pk)])
+        self.assertEqual(self.items('eth'), [('education', Education.objects.get().pk)])
+
+    def test_index_follows_writes(self):
+        self.backend.title = 'Data Scientist'
+        self.backend.save()
+        self.assertEqual(self.items('engineer'), [('experiences', self.frontend.pk)])
+        self.frontend.delete()
+        self.assertEqual(self.items('engineer'), [])
+        self.assertEqual(self.items('scientist', limit=1, offset=1), [])
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        self.assertEqual(self.items('engineer'), [])
+        out = io.StringIO()
+        call_command('rebuild_search_index', batch_size=1, stdout=out)
+        self.assertIn('Indexed 2 Work Experiences', out.getvalue())
+        self.assertEqual(self.items('engineer'), [('experiences', self.backend.pk), ('experiences', self.frontend.pk)])
+        with self.assertRaisesMessage(CommandError, '--batch-size must be positive'):
+            call_command('rebuild_search_index', batch_size=0, stdout=io.StringIO())
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        page = client.get('/api/search/', {'q': 'engineer', 'limit': 1}).data
+        self.assertEqual(page['results'][0]['user'], self.users[0].pk)
+        self.assertEqual(page['results'][0]['item']['title'], 'Backend Engineer')
+        self.assertEqual(client.get(page['next']).data['results'][0]['item']['id'], self.frontend.pk)
+        self.assertEqual(client.get('/api/search/').status_code, 400)
+
+
+class SparseResumeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('sparse', 'sparse@example.com', 'secret')
+        PersonalInfo.objects.create(user=self.user, full_name='Sparse User', professional_title='Engineer')
+        Experience.objects.create(user=self.user, title='Engineer', company='ACME', description='Long text')
+        Skill.objects.create(user=self.user, skills='Python')
+        recompute_progress([self.user.pk])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_partial_render_matches_cached_slice(self):
+        selections = [
+            ('/api/resume/?sections=personal_info,skills', ('personal_info', 'skills'), {}),
+            ('/api/resume/?sections=experiences,progress&fields[experiences]=title,company',
+             ('experiences', 'progress'), {'experiences': ['title', 'company']}),
+            ('/api/resume/?fields[personal_info]=full_name', RESUME_PARTS, {'personal_info': ['full_name']}),
+        ]
+        for url, parts, fields in selections:
+            cache.clear()
+            with self.assertNumQueries(1):
+                rendered = self.client.get(url).json()
+            self.client.get('/api/resume/')
+            with self.assertNumQueries(0):
+                sliced = self.client.get(url).json()
+            self.assertEqual(rendered, sliced)
+            self.assertEqual(sliced, json.loads(FastJSONRenderer().render(
+                select_resume(render_resume(self.user), parts, fields)
+            )))
+        self.assertEqual(rendered['personal_info'], {'full_name': 'Sparse User'})
+        self.assertEqual(rendered['progress']['experience'], 0)
+
+    def test_invalid_selection(self):
+        self.assertEqual(self.client.get('/api/resume/?sections=salary').status_code, 400)
+        self.assertEqual(self.client.get('/api/resume/?fields[experiences]=salary').status_code, 400)
+        self.assertEqual(self.client.get('/api/resume/?fields[salary]=amount').status_code, 400)
+
+    def test_progress_without_stored_counts(self):
+        ResumeProgress.objects.all().delete()
+        data = self.client.get('/api/resume/?sections=progress').json()
+        self.assertEqual(data, {'progress': render_resume(self.user)['progress']})
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('syncer', 'syncer@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def changes(self, since=None):
+        response = self.client.get('/api/resume/changes/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_since_watermark(self):
+        kept = self.client.post('/api/experience/', {'title': 'Kept'}).json()
+        removed = self.client.post('/api/experience/', {'title': 'Removed'}).json()
+        snapshot = self.changes()
+        self.assertEqual([row['title'] for row in snapshot['changed']['experiences']], ['Removed', 'Kept'])
+        self.assertEqual(snapshot['deleted']['experiences'], [])
+
+        with self.settings(SYNC_WATERMARK_OVERLAP=0):
+            self.client.patch(f'/api/experience/{kept["id"]}/', {'company': 'ACME'})
+            self.client.delete(f'/api/experience/{removed["id"]}/')
+            project = self.client.post('/api/projects/batch/', {'create': [{'name': 'Pave'}]}, format='json').json()[0]
+            self.client.post('/api/projects/batch/', {'delete': [project['id']]}, format='json')
+            delta = self.changes(snapshot['watermark'])
+            self.assertEqual(delta['changed']['experiences'], [self.client.get(f'/api/experience/{kept["id"]}/').json()])
+            self.assertEqual(delta['deleted'], {
+                'personal_info': [], 'experiences': [removed['id']], 'education': [], 'projects': [project['id']], 'skills': [],
+            })
+            self.assertEqual(delta['progress'], self.client.get('/api/resume/').json()['progress'])
+
+            latest = self.changes(delta['watermark'])
+            self.assertEqual(sum(len(rows) for rows in latest['changed'].values()), 0)
+            self.assertEqual(sum(len(ids) for ids in latest['deleted'].values()), 0)
+
+    def test_invalid_and_expired_watermarks(self):
+        self.assertEqual(self.client.get('/api/resume/changes/', {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/resume/changes/', {'since': '2001-01-01T00:00:00Z'}).status_code, 410)
+
+
+class ResumePatchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('editor', 'editor@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.resume = self.client.patch('/api/resume/', {
+            'personal_info': {'full_name': 'Editor'},
+            'experiences': [{'title': 'Newest'}, {'title': 'Older'}, {'title': 'Oldest'}],
+            'skills': {'skills': 'Python'},
+        }, format='json').json()
+
+    def test_created_in_listed_order(self):
+        self.assertEqual([row['title'] for row in self.resume['experiences']], ['Newest', 'Older', 'Oldest'])
+        self.assertEqual(self.resume['personal_info']['full_name'], 'Editor')
+        self.assertEqual(self.resume['progress']['personalInfo'], 100)
+        self.assertEqual(self.resume['progress']['skills'], 100)
+
+    def test_only_changed_rows_are_written(self):
+        newest, older, oldest = self.resume['experiences']
+        document = dict(self.resume, experiences=[dict(newest, company='ACME'), older, {'title': 'Added'}])
+        response = self.client.patch('/api/resume/', document, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual([row['title'] for row in data['experiences']], ['Added', 'Newest', 'Older'])
+        rows = {row['id']: row for row in data['experiences']}
+        self.assertEqual(rows[newest['id']]['company'], 'ACME')
+        self.assertNotEqual(rows[newest['id']]['updated_at'], newest['updated_at'])
+        self.assertEqual(rows[older['id']], older)
+        self.assertNotIn(oldest['id'], rows)
+        self.assertEqual(data['personal_info'], self.resume['personal_info'])
+        self.assertEqual(data['skills'], self.resume['skills'])
+        self.assertEqual(data, json.loads(FastJSONRenderer().render(render_resume(self.user))))
+
+    def test_invalid_document_writes_nothing(self):
+        response = self.client.patch('/api/resume/', {
+            'personal_info': {'full_name': 'Changed'},
+            'experiences': [{'id': 0, 'title': 'Stolen'}],
+            'projects': [{'name': 'x' * 200}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'experiences', 'projects'})
+        self.assertEqual(json.loads(FastJSONRenderer().render(render_resume(self.user))), self.resume)
+
+
+class RowVersionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('versioned', 'versioned@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.experience = self.client.post('/api/experience/', {'title': 'Engineer'}).json()
+        self.url = f'/api/experience/{self.experience["id"]}/'
+
+    def test_conditional_update(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.patch(self.url, {'company': 'ACME'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotEqual(first['ETag'], etag)
+        self.assertEqual(self.client.get(self.url)['ETag'], first['ETag'])
+
+        stale = self.client.patch(self.url, {'company': 'Other'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(self.client.get('/api/resume/').json()['experiences'][0]['company'], 'ACME')
+
+        unconditional = self.client.patch(self.url, {'company': 'Other'})
+        self.assertEqual(unconditional.status_code, 200)
+        self.assertNotEqual(unconditional['ETag'], first['ETag'])
+
+    def test_conditional_delete(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.post('/api/experience/batch/', {'update': [{'id': self.experience['id'], 'title': 'Lead'}]}, format='json')
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=etag).status_code, 412)
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=self.client.get(self.url)['ETag']).status_code, 204)
+
+    def test_singletons(self):
+        response = self.client.get('/api/skills/')
+        updated = self.client.put('/api/skills/', {'skills': 'Python, Go'}, HTTP_IF_MATCH=response['ETag'])
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(sorted(Skill.objects.get(user=self.user).tags.values_list('name', flat=True)), ['Go', 'Python'])
+        self.assertEqual(self.client.put('/api/skills/', {'skills': 'Rust'}, HTTP_IF_MATCH=response['ETag']).status_code, 412)
+
+
+class ProvisioningTests(TestCase):
+
+    def test_registration_provisions_singletons(self):
+        client = APIClient()
+        response = client.post('/api/register/', {'username': 'fresh', 'email': 'fresh@example.com', 'password': 'secret-Pa55'})
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username='fresh')
+        self.assertTrue(PersonalInfo.objects.filter(user=user, full_name='').exists())
+        self.assertTrue(Skill.objects.filter(user=user, skills='').exists())
+        self.assertEqual(ResumeProgress.objects.get(user=user).personal_info, 0)
+
+        client.force_authenticate(user)
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get('/api/personalInfo/').status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get('/api/skills/').status_code, 200)
+
+    def test_backfill(self):
+        user = User.objects.create_user('legacy', 'legacy@example.com', 'secret')
+        Experience.objects.create(user=user, title='Engineer', company='ACME', location='Remote',
+                                  duration='2020', description='Built')
+        provisioned = User.objects.create_user('provisioned', 'provisioned@example.com', 'secret')
+        PersonalInfo.objects.create(user=provisioned, full_name='Kept')
+        Skill.objects.create(user=provisioned, skills='Python')
+        recompute_progress([provisioned.pk])
+
+        out = io.StringIO()
+        call_command('provision_resumes', stdout=out)
+        self.assertIn('for 1 users', out.getvalue())
+        self.assertEqual(PersonalInfo.objects.get(user=user).full_name, '')
+        self.assertEqual(Skill.objects.get(user=user).skills, '')
+        self.assertEqual(ResumeProgress.objects.get(user=user).experience, 1)
+        self.assertEqual(PersonalInfo.objects.get(user=provisioned).full_name, 'Kept')
+        with self.assertRaisesMessage(CommandError, '--batch-size must be positive'):
+            call_command('provision_resumes', batch_size=-1, stdout=io.StringIO())
+
+    def test_first_access_invalidates_cached_resume(self):
+        cache.clear()
+        user = User.objects.create_user('unprovisioned', 'unprovisioned@example.com', 'secret')
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertIsNone(client.get('/api/resume/').json()['personal_info'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.get('/api/skills/').status_code, 200)
+        resume = client.get('/api/resume/').json()
+        self.assertEqual(resume['personal_info']['full_name'], '')
+        self.assertEqual(resume['skills']['skills'], '')
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'auth': '2/min', 'read': '3/min', 'write': '2/min'},
+})
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('throttled', 'throttled@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_scopes_have_separate_buckets(self):
+        for _ in range(2):
+            self.assertEqual(self.client.post('/api/experience/', {'title': 'Engineer'}).status_code, 201)
+        throttled = self.client.post('/api/experience/', {'title': 'Engineer'})
+        self.assertEqual(throttled.status_code, 429)
+        self.assertTrue(0 < int(throttled['Retry-After']) <= 60)
+
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/experience/').status_code, 200)
+        self.assertEqual(self.client.get('/api/experience/').status_code, 429)
+        self.assertEqual(self.client.get('/api/async/experience/').status_code, 429)
+
+    def test_auth_is_keyed_by_client_address(self):
+        anonymous = APIClient()
+        credentials = {'username': 'throttled', 'password': 'wrong'}
+        for _ in range(2):
+            self.assertEqual(anonymous.post('/api/login/', credentials).status_code, 401)
+        self.assertEqual(anonymous.post('/api/login/', credentials).status_code, 429)
+        self.assertEqual(anonymous.post('/api/register/', {}).status_code, 429)
+        other = APIClient(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.post('/api/login/', credentials).status_code, 401)
+        # A made-up X-Forwarded-For does not buy a fresh bucket
+        spoofed = anonymous.post('/api/login/', credentials, HTTP_X_FORWARDED_FOR='10.0.0.3')
+        self.assertEqual(spoofed.status_code, 429)
+
+    def test_bucket_refills_continuously(self):
+        now = 1_000_000.0
+        self.assertIsNone(take_token('write', 'user:1', now))
+        self.assertIsNone(take_token('write', 'user:1', now))
+        self.assertEqual(take_token('write', 'user:1', now), 30)
+        # One token is back after half the period and only one
+        self.assertEqual(take_token('write', 'user:1', now + 15), 15)
+        self.assertIsNone(take_token('write', 'user:1', now + 30))
+        self.assertEqual(take_token('write', 'user:1', now + 30), 30)
+        # An idle bucket fills up to its capacity, not beyond
+        for _ in range(2):
+            self.assertIsNone(take_token('write', 'user:1', now + 1000))
+        self.assertIsNotNone(take_token('write', 'user:1', now + 1000))
+
+    def test_concurrent_takes(self):
+        taken = []
+        threads = [
+            threading.Thread(target=lambda: taken.append(take_token('read', 'user:1') is None))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(taken.count(True), 3)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('measured', 'measured@example.com', 'secret')
+        PersonalInfo.objects.create(user=self.user, full_name='Measured')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, {'endpoint': 'complete-resume', 'method': 'GET', **labels}) or 0
+
+    def test_records_requests_per_url_name(self):
+        before = {
+            'requests': self.sample('api_requests_total', status='200'),
+            'latency': self.sample('api_request_duration_seconds_count'),
+            'queries': self.sample('api_request_queries_sum'),
+            'size': self.sample('api_response_size_bytes_sum'),
+        }
+        response = self.client.get('/api/resume/')
+        self.assertEqual(self.sample('api_requests_total', status='200'), before['requests'] + 1)
+        self.assertEqual(self.sample('api_request_duration_seconds_count'), before['latency'] + 1)
+        self.assertGreater(self.sample('api_request_queries_sum'), before['queries'])
+        self.assertEqual(self.sample('api_response_size_bytes_sum'), before['size'] + len(response.content))
+
+        unmatched = REGISTRY.get_sample_value('api_requests_total', {'endpoint': 'unmatched', 'method': 'GET', 'status': '404'}) or 0
+        self.client.get('/api/nowhere/')
+        self.assertEqual(
+            REGISTRY.get_sample_value('api_requests_total', {'endpoint': 'unmatched', 'method': 'GET', 'status': '404'}),
+            unmatched + 1,
+        )
+
+        with self.settings(METRICS_TOKEN='scrape-token'):
+            scrape = APIClient().get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(scrape.status_code, 200)
+        self.assertIn(b'api_request_duration_seconds_bucket{endpoint="complete-resume"', scrape.content)
+
+    def test_unknown_methods_share_a_label(self):
+        other = REGISTRY.get_sample_value('api_requests_total', {'endpoint': 'complete-resume', 'method': 'other', 'status': '405'}) or 0
+        for method in ('BREW', 'PROPFIND'):
+            self.client.generic(method, '/api/resume/')
+        self.assertEqual(self.sample('api_requests_total', method='other', status='405'), other + 2)
+        self.assertIsNone(REGISTRY.get_sample_value('api_requests_total', {'endpoint': 'complete-resume', 'method': 'BREW', 'status': '405'}))
+
+    def test_token(self):
+        self.assertEqual(APIClient().get('/api/metrics/').status_code, 403)
+        with self.settings(METRICS_TOKEN='scrape-token'):
+            self.assertEqual(APIClient().get('/api/metrics/').status_code, 403)
+            response = APIClient().get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-token')
+            self.assertEqual(response.status_code, 200)
+
+
+# Most queries a request to each API route may run, whatever the size of
+# the resume it touches, with JWT authentication and cold caches (SQLite
+# counts savepoints as queries). Lower these as optimizations land.
+QUERY_BUDGETS = {
+    ('api-overview', 'GET'): 1,
+    ('complete-resume', 'GET'): 2,
+    ('complete-resume', 'PATCH'): 12,
+    ('resume-render', 'GET'): 2,
+    ('resume-changes', 'GET'): 3,
+    ('personal-info', 'GET'): 2,
+    ('personal-info', 'PATCH'): 7,
+    ('experience-list', 'GET'): 2,
+    ('experience-list', 'POST'): 9,
+    ('experience-detail', 'GET'): 2,
+    ('experience-detail', 'PATCH'): 13,
+    ('experience-detail', 'DELETE'): 11,
+    ('experience-batch', 'POST'): 13,
+    ('education-list', 'GET'): 2,
+    ('education-list', 'POST'): 9,
+    ('education-detail', 'GET'): 2,
+    ('education-detail', 'PATCH'): 13,
+    ('education-detail', 'DELETE'): 11,
+    ('education-batch', 'POST'): 13,
+    ('projects-list', 'GET'): 2,
+    ('projects-list', 'POST'): 12,
+    ('projects-detail', 'GET'): 2,
+    ('projects-detail', 'PATCH'): 13,
+    ('projects-detail', 'DELETE'): 12,
+    ('projects-batch', 'POST'): 19,
+    ('skills', 'GET'): 2,
+    ('skills', 'PATCH'): 13,
+    ('async-complete-resume', 'GET'): 0,
+    ('async-experience-list', 'GET'): 2,
+    ('async-education-list', 'GET'): 2,
+    ('async-projects-list', 'GET'): 2,
+    ('register', 'POST'): 10,
+    ('login', 'POST'): 1,
+    ('users-by-tag', 'GET'): 2,
+    ('search', 'GET'): 5,
+    ('metrics', 'GET'): 0,
+    ('hashing-metrics', 'GET'): 1,
+}
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class QueryBudgetTests(TestCase):
+    """
+    Every API route must stay within its entry of ``QUERY_BUDGETS`` and run
+    as many queries for a small resume as for a large one.
+    """
+    sizes = (1, 10, 50)
+    # Measured with the resume cached: the cold path reads each section on
+    # its own thread and connection, which a test transaction cannot share
+    warm_routes = {'async-complete-resume'}
+    # Sent instead of the JWT
+    route_headers = {'metrics': {'HTTP_AUTHORIZATION': 'Bearer scrape-token'}}
+
+    def seed(self, size):
+        user = User.objects.create_user(f'budget{size}', f'budget{size}@example.com', 'secret', is_staff=True)
+        provision_resumes([user.pk], new_users=True)
+        PersonalInfo.objects.filter(user=user).update(full_name=f'Budget {size}')
+        Skill.objects.filter(user=user).update(skills='Python, Django')
+        for index in range(size):
+            Experience.objects.create(user=user, title=f'Engineer {index}', company='ACME', description='Python')
+            Education.objects.create(user=user, degree=f'Degree {index}', institution='ETH')
+            Project.objects.create(user=user, name=f'Project {index}', technologies='Python, Django')
+        recompute_progress([user.pk])
+        return user
+
+    def requests(self, user, size):
+        """
+        ``(route, method, path, data)`` of the requests measured for ``user``,
+        ordered so that writes come after the reads of the same rows.
+        """
+        ids = {
+            'experience': Experience.objects.filter(user=user).order_by('pk').first().pk,
+            'education': Education.objects.filter(user=user).order_by('pk').first().pk,
+            'projects': Project.objects.filter(user=user).order_by('pk').first().pk,
+        }
+        requests = [
+            ('api-overview', 'GET', '/api/', None),
+            ('complete-resume', 'GET', '/api/resume/', None),
+            ('resume-render', 'GET', '/api/resume/render/html/', None),
+            ('resume-changes', 'GET', '/api/resume/changes/', None),
+            ('personal-info', 'GET', '/api/personalInfo/', None),
+            ('skills', 'GET', '/api/skills/', None),
+            ('async-complete-resume', 'GET', '/api/async/resume/', None),
+            ('users-by-tag', 'GET', '/api/users/by-tag/?skill=python', None),
+            ('search', 'GET', '/api/search/?q=engineer', None),
+            ('metrics', 'GET', '/api/metrics/', None),
+            ('hashing-metrics', 'GET', '/api/metrics/hashing/', None),
+        ]
+        for section, prefix in (('experience', 'experience'), ('education', 'education'), ('projects', 'projects')):
+            detail = f'/api/{prefix}/{ids[section]}/'
+            requests += [
+                (f'{section}-list', 'GET', f'/api/{prefix}/', None),
+                (f'async-{section}-list', 'GET', f'/api/async/{prefix}/', None),
+                (f'{section}-detail', 'GET', detail, None),
+                (f'{section}-list', 'POST', f'/api/{prefix}/', {}),
+                (f'{section}-detail', 'PATCH', detail, {'description': 'Changed'}),
+                (f'{section}-batch', 'POST', f'/api/{prefix}/batch/', {'create': [{}], 'update': [{'id': ids[section]}]}),
+                (f'{section}-detail', 'DELETE', detail, None),
+            ]
+        requests += [
+            ('personal-info', 'PATCH', '/api/personalInfo/', {'location': 'Zürich'}),
+            ('skills', 'PATCH', '/api/skills/', {'skills': 'Python, Go'}),
+            ('complete-resume', 'PATCH', '/api/resume/', {'skills': {'skills': 'Rust'}}),
+            ('register', 'POST', '/api/register/', {'username': f'joined{size}', 'email': '', 'password': 'secret-Pa55'}),
+            ('login', 'POST', '/api/login/', {'username': user.username, 'password': 'secret'}),
+        ]
+        return requests
+
+    def test_every_route_has_a_budget(self):
+        routes = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(routes, {route for route, _ in QUERY_BUDGETS})
+
+    def test_query_budgets(self):
+        counts = {}
+        for size in self.sizes:
+            user = self.seed(size)
+            self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+            for route, method, path, data in self.requests(user, size):
+                # Measure cold caches, which also resets the throttle buckets
+                cache.clear()
+                if route in self.warm_routes:
+                    self.client.get('/api/resume/')
+                call = getattr(self.client, method.lower())
+                headers = self.route_headers.get(route, {})
+                with CaptureQueriesContext(connection) as queries:
+                    if data is not None:
+                        response = call(path, data, content_type='application/json', **headers)
+                    else:
+                        response = call(path, **headers)
+                self.assertLess(response.status_code, 300, f'{method} {path}: {response.content[:200]}')
+                counts.setdefault((route, method), {})[size] = len(queries)
+
+        for (route, method), by_size in counts.items():
+            with self.subTest(route=route, method=method):
+                self.assertLessEqual(max(by_size.values()), QUERY_BUDGETS[route, method], by_size)
+                self.assertEqual(len(set(by_size.values())), 1, f'Query count grows with the resume: {by_size}')
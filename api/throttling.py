@@ -0,0 +1,108 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    ``'<tokens>/<period>'`` as ``(tokens, seconds)``, e.g. ``'20/min'`` ->
+    ``(20, 60)``. An empty rate means no limit and gives ``None``.
+    """
+    if not rate:
+        return None
+    tokens, period = rate.split('/')
+    return int(tokens), PERIODS[period[0]]
+
+
+def client_ident(request, user=None):
+    """
+    Bucket key of a request: the user's id, or the client address when
+    anonymous. ``X-Forwarded-For`` is only trusted for the ``NUM_PROXIES``
+    proxies in front of the app; without any, ``REMOTE_ADDR`` is used.
+    """
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{BaseThrottle().get_ident(request)}'
+
+
+# A bucket is updated under a lock taken with ``cache.add``: attempts to
+# take it, the pause between attempts and how long a crashed holder keeps it
+LOCK_ATTEMPTS = 50
+LOCK_RETRY_DELAY = 0.002
+LOCK_TIMEOUT = 1
+
+
+def _lock(cache, key):
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(key, 1, timeout=LOCK_TIMEOUT):
+            return True
+        time.sleep(LOCK_RETRY_DELAY)
+    return False
+
+
+def take_token(scope, ident, now=None):
+    """
+    Take one token from the ``scope`` bucket of ``ident``. Returns ``None``
+    if one was left, otherwise the seconds until the next token.
+
+    A bucket holds at most the scope's tokens and refills continuously at
+    ``tokens / period`` per second, so no more than a bucketful is ever
+    taken in a burst. It is stored as ``(tokens, refilled_at)`` under one
+    cache key and read and written under a per-bucket lock, so the check
+    holds across processes sharing the cache. A bucket too contended to
+    lock counts as empty.
+    """
+    rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+    if rate is None:
+        return None
+    capacity, period = rate
+    refill_rate = capacity / period
+    key = f'throttle:{scope}:{ident}'
+
+    cache = caches[settings.THROTTLE_CACHE]
+    if not _lock(cache, f'{key}:lock'):
+        return 1 / refill_rate
+    try:
+        now = time.time() if now is None else now
+        tokens, refilled_at = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - refilled_at, 0) * refill_rate)
+        if tokens < 1:
+            return (1 - tokens) / refill_rate
+        # An untouched bucket is full again after one period
+        cache.set(key, (tokens - 1, now), timeout=period)
+        return None
+    finally:
+        cache.delete(f'{key}:lock')
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    Token-bucket throttle with separate budgets for sign-in and
+    registration (``auth``), safe methods (``read``) and other methods
+    (``write``). Views may pick a budget with ``throttle_scope``.
+    """
+
+    def get_scope(self, request, view):
+        # Imported here: simplejwt's views import this module through APIView
+        from rest_framework_simplejwt.views import TokenViewBase
+
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        if isinstance(view, TokenViewBase):
+            return 'auth'
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def allow_request(self, request, view):
+        self.wait_time = take_token(self.get_scope(request, view), client_ident(request, request.user))
+        return self.wait_time is None
+
+    def wait(self):
+        return self.wait_time
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, metrics, views
 
 urlpatterns = [
     # API Overview
@@ -7,6 +7,8 @@ urlpatterns = [
     
     # Complete Resume
     path('resume/', views.complete_resume, name='complete-resume'),
+    path('resume/render/<str:fmt>/', views.rendered_resume, name='resume-render'),
+    path('resume/changes/', views.resume_changes, name='resume-changes'),
     
     # Personal Info
     path('personalInfo/', views.PersonalInfoView.as_view(), name='personal-info'),
@@ -14,19 +16,36 @@ urlpatterns = [
     # Experience
     path('experience/', views.ExperienceListCreateView.as_view(), name='experience-list'),
     path('experience/<int:pk>/', views.ExperienceDetailView.as_view(), name='experience-detail'),
+    path('experience/batch/', views.ExperienceBatchView.as_view(), name='experience-batch'),
     
     # Education
     path('education/', views.EducationListCreateView.as_view(), name='education-list'),
     path('education/<int:pk>/', views.EducationDetailView.as_view(), name='education-detail'),
+    path('education/batch/', views.EducationBatchView.as_view(), name='education-batch'),
     
     # Projects
     path('projects/', views.ProjectListCreateView.as_view(), name='projects-list'),
     path('projects/<int:pk>/', views.ProjectDetailView.as_view(), name='projects-detail'),
+    path('projects/batch/', views.ProjectBatchView.as_view(), name='projects-batch'),
     
     # Skills
     path('skills/', views.SkillView.as_view(), name='skills'),
 
+    # Async variants for ASGI deployments
+    path('async/resume/', async_views.complete_resume, name='async-complete-resume'),
+    path('async/experience/', async_views.experience_list, name='async-experience-list'),
+    path('async/education/', async_views.education_list, name='async-education-list'),
+    path('async/projects/', async_views.project_list, name='async-projects-list'),
+
     # User Authentication
     path('register/', views.UserRegistrationView.as_view(), name='register'),
     path('login/', views.UserLoginView.as_view(), name='login'),
+
+    # Lookups
+    path('users/by-tag/', views.users_by_tag, name='users-by-tag'),
+    path('search/', views.search_resumes, name='search'),
+
+    # Metrics
+    path('metrics/', metrics.metrics, name='metrics'),
+    path('metrics/hashing/', views.hashing_metrics, name='hashing-metrics'),
 ]
\ No newline at end of file
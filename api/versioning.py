@@ -0,0 +1,79 @@
+from django.db import router
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The row was changed by another request. Fetch it again and retry.'
+    default_code = 'precondition_failed'
+
+
+def row_etag(instance):
+    return f'"{instance.pk}-{instance.version}"'
+
+
+def if_match_version(request, instance):
+    """
+    The version a write must find the row at: that of ``instance`` when
+    ``If-Match`` names its ETag, ``None`` without a precondition.
+    """
+    header = request.headers.get('If-Match')
+    if header is None:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    if row_etag(instance) not in etags:
+        raise PreconditionFailed()
+    return instance.version
+
+
+def update_row(instance, data, version=None):
+    """
+    Write ``data`` to ``instance`` with a single ``UPDATE`` that bumps its
+    version, guarded by ``WHERE version = <version>`` when given. Raises
+    ``PreconditionFailed`` when a concurrent write got there first.
+
+    ``post_save`` is sent as ``save()`` would, so signal receivers keep
+    the cache, tags and search index in sync.
+    """
+    model = type(instance)
+    now = timezone.now()
+    rows = model.objects.filter(pk=instance.pk)
+    if version is not None:
+        rows = rows.filter(version=version)
+    if not rows.update(**data, updated_at=now, version=F('version') + 1):
+        raise PreconditionFailed()
+
+    for field, value in data.items():
+        setattr(instance, field, value)
+    instance.updated_at = now
+    if version is not None:
+        instance.version = version + 1
+    else:
+        instance.refresh_from_db(fields=['version'])
+    post_save.send(
+        sender=model, instance=instance, created=False, raw=False,
+        using=router.db_for_write(model, instance=instance),
+        update_fields=frozenset([*data, 'updated_at', 'version']),
+    )
+
+
+def delete_row(instance, version=None):
+    """
+    Delete ``instance``, only while it is still at ``version`` when given.
+    The row is locked first, so call this inside ``transaction.atomic``.
+    Returns whether the row was deleted; a concurrent delete may have won.
+    """
+    model = type(instance)
+    if version is not None:
+        locked = model.objects.select_for_update().filter(pk=instance.pk, version=version)
+        if not list(locked.values_list('pk', flat=True)):
+            raise PreconditionFailed()
+    _, deleted = model.objects.filter(pk=instance.pk).delete()
+    return deleted.get(model._meta.label, 0) == 1
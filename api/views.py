@@ -1,18 +1,41 @@
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from . import hashing
+from .batch import ResumePatchSerializer, SectionBatchSerializer, run_resume_patch, run_section_batch
 from .models import PersonalInfo, Experience, Education, Project, Skill
+from .pagination import KeysetPagination
+from .progress import is_complete, record_progress
+from .provisioning import provision_resumes
+from .renderers import FastJSONRenderer, HTMLDocumentRenderer, PDFDocumentRenderer
+from .rendering import CONTENT_TYPES, get_rendered_resume
+from .resume import (
+    RESUME_PARTS, RESUME_SECTIONS, get_resume, get_resume_selection, invalidate_resume, render_resume, resume_etag
+)
+from .search import search
+from .sync import WatermarkExpired, get_changes, record_deletions
+from .versioning import delete_row, if_match_version, row_etag, update_row
+from .tags import normalize_tag
 from .serializers import (
     PersonalInfoSerializer, ExperienceSerializer, EducationSerializer,
-    ProjectSerializer, SkillSerializer, CompleteResumeSerializer, APISchemaSerializer, UserRegistrationSerializer
+    ProjectSerializer, SkillSerializer, CompleteResumeSerializer, APISchemaSerializer, UserRegistrationSerializer,
+    HashingPoolStatsSerializer, TaggedUserPageSerializer, SearchPageSerializer, ResumeChangesSerializer,
+    represent_rows
 )
 
 
@@ -37,139 +60,322 @@ def api_overview(request):
     return Response(serializer.data)
 
 
-@extend_schema(responses={200: CompleteResumeSerializer})
-@api_view(['GET'])
+def _comma_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def resume_selection(query_params):
+    """
+    The ``(parts, fields)`` requested with ``?sections=`` and
+    ``?fields[<section>]=``, or ``(None, None)`` for the complete resume.
+    """
+    parts = None
+    if 'sections' in query_params:
+        parts = _comma_list(query_params['sections'])
+        unknown = sorted(set(parts) - set(RESUME_PARTS))
+        if not parts or unknown:
+            raise ValidationError({'sections': f'Choose from {", ".join(RESUME_PARTS)}.'})
+
+    fields = {}
+    for param, value in query_params.items():
+        if not (param.startswith('fields[') and param.endswith(']')):
+            continue
+        section = param[len('fields['):-1]
+        if section not in RESUME_SECTIONS:
+            raise ValidationError({param: f'Unknown section, choose from {", ".join(RESUME_SECTIONS)}.'})
+        allowed = RESUME_SECTIONS[section].Meta.fields
+        fields[section] = _comma_list(value)
+        if not fields[section] or set(fields[section]) - set(allowed):
+            raise ValidationError({param: f'Choose from {", ".join(allowed)}.'})
+
+    if parts is None and not fields:
+        return None, None
+    return parts or RESUME_PARTS, fields
+
+
+@extend_schema(methods=['GET'], responses={200: CompleteResumeSerializer}, parameters=[
+    OpenApiParameter('sections', str, description=f'Comma-separated parts to return: {", ".join(RESUME_PARTS)}'),
+    OpenApiParameter('fields[experiences]', str, description='Comma-separated fields to return for a section; '
+                     'likewise fields[personal_info], fields[education], fields[projects] and fields[skills]'),
+])
+@extend_schema(methods=['PATCH'], request=ResumePatchSerializer, responses={200: CompleteResumeSerializer})
+@api_view(['GET', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([FastJSONRenderer, BrowsableAPIRenderer])
 def complete_resume(request):
     """
-    Get complete resume data
+    Get complete resume data, or only some sections and fields of it.
+    PATCH a full or partial resume to save only what changed.
     """
-    data = {
-        'personal_info': PersonalInfo.objects.filter(user=request.user).first(),
-        'experiences': Experience.objects.filter(user=request.user),
-        'education': Education.objects.filter(user=request.user),
-        'projects': Project.objects.filter(user=request.user),
-        'skills': Skill.objects.filter(user=request.user).first()
-    }
-    
-    serializer = CompleteResumeSerializer(instance=data)
-    return Response(serializer.data)
+    if request.method == 'PATCH':
+        document = ResumePatchSerializer(data=request.data)
+        document.is_valid(raise_exception=True)
+        run_resume_patch(request.user, document.validated_data, max_items=SectionBatchView.max_items)
+        # Rendered directly: the cache is only invalidated once the
+        # outermost transaction commits
+        data = render_resume(request.user)
+        response = Response(data)
+        response['ETag'] = resume_etag(data)
+        return response
+
+    parts, fields = resume_selection(request.query_params)
+    if parts is None:
+        data, etag = get_resume(request.user)
+    else:
+        data, etag = get_resume_selection(request.user, parts, fields)
+    response = get_conditional_response(request, etag=etag) or Response(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@extend_schema(responses={(200, 'text/html'): str, (200, 'application/pdf'): bytes})
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([FastJSONRenderer, HTMLDocumentRenderer, PDFDocumentRenderer])
+def rendered_resume(request, fmt):
+    """
+    Get the resume rendered as an HTML page or a PDF document. The format
+    comes from the URL; ``Accept`` only picks how errors are rendered.
+    """
+    if fmt not in CONTENT_TYPES:
+        raise Http404
+    content, etag = get_rendered_resume(request.user, fmt)
+    response = get_conditional_response(request, etag=etag) or HttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@extend_schema(responses={
+    200: ResumeChangesSerializer,
+    410: OpenApiResponse(description='The watermark predates the kept tombstones; fetch a full snapshot'),
+}, parameters=[
+    OpenApiParameter('since', str, description='Watermark returned by the previous call; omit for a full snapshot'),
+])
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([FastJSONRenderer, BrowsableAPIRenderer])
+def resume_changes(request):
+    """
+    Get the section rows changed and the ids deleted since a watermark
+    """
+    since = request.query_params.get('since')
+    if since is not None:
+        try:
+            since = parse_datetime(since)
+        except ValueError:
+            since = None
+        if since is None or since.tzinfo is None:
+            raise ValidationError({'since': 'Pass the watermark of a previous response.'})
+    try:
+        return Response(get_changes(request.user, since))
+    except WatermarkExpired:
+        return Response(
+            {'detail': 'The watermark is too old, fetch the full snapshot without "since".'},
+            status=status.HTTP_410_GONE,
+        )
+
+
+class FastListMixin:
+    """
+    Serve list reads from ``.values()`` rows through the read-only fast
+    serialization path instead of the full serializer.
+    """
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer_class.Meta.fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(represent_rows(serializer_class, page))
+        return Response(represent_rows(serializer_class, queryset))
+
+
+class RowVersionMixin:
+    """
+    Serve a row's version as its ETag and write it with a single
+    ``UPDATE``/``DELETE ... WHERE version = n`` when the request carries
+    ``If-Match``, answering 412 if another write got there first.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = row_etag(instance)
+        response = get_conditional_response(request, etag=etag) or Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response['ETag'] = row_etag(self.written_row)
+        return response
+
+    def locked_row(self, instance):
+        """
+        ``instance`` re-read under a row lock, so the completion it had
+        before the write is the one the write replaces.
+        """
+        locked = type(instance).objects.select_for_update().filter(pk=instance.pk).first()
+        if locked is None:
+            raise Http404
+        return locked
+
+    def perform_update(self, serializer):
+        # Row and progress commit together, so the resume cached after the
+        # commit never pairs the new row with the old counters
+        with transaction.atomic():
+            instance = serializer.instance = self.locked_row(serializer.instance)
+            was_complete = is_complete(instance)
+            update_row(instance, serializer.validated_data, if_match_version(self.request, instance))
+            record_progress(self.request.user, type(instance), was_complete, is_complete(instance))
+        self.written_row = instance
+
+    def perform_destroy(self, instance):
+        model = type(instance)
+        with transaction.atomic():
+            instance = self.locked_row(instance)
+            was_complete = is_complete(instance)
+            if not delete_row(instance, if_match_version(self.request, instance)):
+                raise Http404
+            record_deletions(self.request.user, model, [instance.pk])
+            record_progress(self.request.user, model, was_complete, False)
+
+
+def get_singleton(model, user):
+    """
+    The personal info or skills row of ``user``. Both are created at
+    registration, so this is a plain read; users created another way get
+    theirs on first access.
+    """
+    try:
+        return model.objects.get(user=user)
+    except model.DoesNotExist:
+        # bulk_create sends no signals, so drop the cached resume here
+        provision_resumes([user.pk])
+        invalidate_resume(user.pk)
+        return model.objects.get(user=user)
 
 
 # Personal Info Views
-class PersonalInfoView(generics.RetrieveUpdateAPIView):
+class PersonalInfoView(RowVersionMixin, generics.RetrieveUpdateAPIView):
     serializer_class = PersonalInfoSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        user = self.request.user
-        personal_info, created = PersonalInfo.objects.get_or_create(
-            user=user,
-            defaults={
-                'full_name': '',
-                'email': '',
-                'phone': '',
-                'location': '',
-                'professional_title': ''
-            }
-        )
-        return personal_info
-
-    def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
+        return get_singleton(PersonalInfo, self.request.user)
 
 
 # Experience Views
-class ExperienceListCreateView(generics.ListCreateAPIView):
+class ExperienceListCreateView(FastListMixin, generics.ListCreateAPIView):
     serializer_class = ExperienceSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Experience.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            instance = serializer.save(user=self.request.user)
+            record_progress(self.request.user, Experience, False, is_complete(instance))
 
 
-class ExperienceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ExperienceDetailView(RowVersionMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ExperienceSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Experience.objects.filter(user=self.request.user)
 
-    def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
-
-    def perform_destroy(self, instance):
-        instance.delete()
-
 
 # Education Views
-class EducationListCreateView(generics.ListCreateAPIView):
+class EducationListCreateView(FastListMixin, generics.ListCreateAPIView):
     serializer_class = EducationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Education.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            instance = serializer.save(user=self.request.user)
+            record_progress(self.request.user, Education, False, is_complete(instance))
 
 
-class EducationDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EducationDetailView(RowVersionMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = EducationSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Education.objects.filter(user=self.request.user)
 
-    def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
-
-    def perform_destroy(self, instance):
-        instance.delete()
-
 
 # Project Views
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(FastListMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Project.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            instance = serializer.save(user=self.request.user)
+            record_progress(self.request.user, Project, False, is_complete(instance))
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailView(RowVersionMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Project.objects.filter(user=self.request.user)
 
-    def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
 
-    def perform_destroy(self, instance):
-        instance.delete()
+# Batch Views
+class SectionBatchView(generics.GenericAPIView):
+    """
+    Apply a list of creates, updates and deletes to one section in a single
+    transaction and return the resulting section.
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 500
+
+    def get_queryset(self):
+        return self.get_serializer_class().Meta.model.objects.filter(user=self.request.user)
+
+    @extend_schema(request=SectionBatchSerializer)
+    def post(self, request, *args, **kwargs):
+        batch = SectionBatchSerializer(data=request.data, context={'max_items': self.max_items})
+        batch.is_valid(raise_exception=True)
+        run_section_batch(request.user, self.get_serializer_class(), batch.validated_data)
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response(serializer.data)
+
+
+class ExperienceBatchView(SectionBatchView):
+    serializer_class = ExperienceSerializer
+
+
+class EducationBatchView(SectionBatchView):
+    serializer_class = EducationSerializer
+
+
+class ProjectBatchView(SectionBatchView):
+    serializer_class = ProjectSerializer
 
 
 # Skill Views
-class SkillView(generics.RetrieveUpdateAPIView):
+class SkillView(RowVersionMixin, generics.RetrieveUpdateAPIView):
     serializer_class = SkillSerializer
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
-        skill, created = Skill.objects.get_or_create(
-            user=self.request.user,
-            defaults={
-                'skills': ''
-            }
-        )
-        return skill
+        return get_singleton(Skill, self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -179,6 +385,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'auth'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -190,3 +397,82 @@ class UserRegistrationView(generics.CreateAPIView):
 
 class UserLoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
+
+
+@extend_schema(responses={200: HashingPoolStatsSerializer})
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def hashing_metrics(request):
+    """
+    Password hashing pool latency and queue depth for this process
+    """
+    return Response(hashing.pool.stats())
+
+
+# Lookup parameter -> (model, tag relation) of the users-by-tag endpoint
+TAG_LOOKUPS = {
+    'skill': (Skill, 'tags'),
+    'technology': (Project, 'technology_tags'),
+}
+
+
+@extend_schema(responses={200: TaggedUserPageSerializer}, parameters=[
+    OpenApiParameter('skill', str, description='Skill the users list, case-insensitive'),
+    OpenApiParameter('technology', str, description='Technology used in one of their projects, case-insensitive'),
+    OpenApiParameter('after', int, description='Return users with a larger id'),
+    OpenApiParameter('limit', int, description='Number of users to return, at most 1000'),
+])
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def users_by_tag(request):
+    """
+    Find users by skill or project technology through the tag indexes
+    """
+    lookups = [name for name in TAG_LOOKUPS if request.query_params.get(name)]
+    if len(lookups) != 1:
+        return Response({'detail': 'Pass exactly one of "skill" or "technology".'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        after = int(request.query_params.get('after', 0))
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return Response({'detail': '"after" and "limit" must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    model, relation = TAG_LOOKUPS[lookups[0]]
+    tagged = model.objects.filter(**{f'{relation}__normalized_name': normalize_tag(request.query_params[lookups[0]])})
+    users = list(
+        User.objects.filter(pk__in=tagged.values('user_id'), pk__gt=after)
+        .order_by('pk').values('id', 'username')[:limit + 1]
+    )
+    next_link = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_link = replace_query_param(request.build_absolute_uri(), 'after', users[-1]['id'])
+    return Response({'next': next_link, 'results': users})
+
+
+@extend_schema(responses={200: SearchPageSerializer}, parameters=[
+    OpenApiParameter('q', str, required=True, description='Words to find in experiences, projects and education'),
+    OpenApiParameter('offset', int, description='Number of results to skip'),
+    OpenApiParameter('limit', int, description='Number of results to return, at most 100'),
+])
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def search_resumes(request):
+    """
+    Ranked full-text search over the experiences, projects and education of all users
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'detail': 'The "q" parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({'detail': '"offset" and "limit" must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = search(query, offset, limit + 1)
+    next_link = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_link = replace_query_param(request.build_absolute_uri(), 'offset', offset + limit)
+    return Response({'next': next_link, 'results': results})
@@ -49,17 +49,31 @@ INSTALLED_APPS = [
     'api',
 ]
 
+# The Lean* middleware behave like their django.contrib counterparts but are
+# skipped for token-authenticated API requests when API_LEAN_PROFILE is on.
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.LeanSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'api.middleware.LeanCsrfViewMiddleware',
+    'api.middleware.LeanAuthenticationMiddleware',
+    'api.middleware.LeanMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Skip session, CSRF, auth and messages middleware for requests that carry an
+# Authorization header and whose path starts with one of these prefixes
+API_LEAN_PROFILE = os.environ.get('API_LEAN_PROFILE', 'True').lower() in ('true', '1', 'yes')
+API_LEAN_PATH_PREFIXES = os.environ.get('API_LEAN_PATH_PREFIXES', '/api/').split(',')
+
+# /api/metrics/ requires 'Authorization: Bearer <METRICS_TOKEN>' and is
+# disabled while it is unset.
+# Under gunicorn, point PROMETHEUS_MULTIPROC_DIR at an empty directory to
+# aggregate the metrics of all workers (see gunicorn.conf.py).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -92,9 +106,69 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # Seconds a connection is reused across requests; 0 reconnects per request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Ping reused connections before the first query of a request
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 10)),
+        },
     }
 }
 
+# Process-level connection pool instead of per-thread persistent connections.
+# Requires psycopg 3 with its pool extra (pip install "psycopg[binary,pool]").
+# Django checks pooled connections before handing them out when
+# CONN_HEALTH_CHECKS is on.
+if os.environ.get('DB_POOL', 'False').lower() in ('true', '1', 'yes'):
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError as e:
+        from django.core.exceptions import ImproperlyConfigured
+
+        raise ImproperlyConfigured(
+            'DB_POOL needs psycopg 3 with its pool extra: pip install "psycopg[binary,pool]"'
+        ) from e
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory is per process; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Seconds a rendered /api/resume/ payload stays cached between edits
+RESUME_CACHE_TIMEOUT = int(os.environ.get('RESUME_CACHE_TIMEOUT', 300))
+
+# Rendered HTML/PDF resumes are keyed by content hash, so they never go stale
+# and can live in a separate (e.g. file based) cache with a long timeout
+if os.environ.get('RESUME_RENDER_CACHE_DIR'):
+    CACHES['renders'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['RESUME_RENDER_CACHE_DIR'],
+    }
+RESUME_RENDER_CACHE = 'renders' if 'renders' in CACHES else 'default'
+RESUME_RENDER_CACHE_TIMEOUT = int(os.environ.get('RESUME_RENDER_CACHE_TIMEOUT', 86400))
+
+# /api/resume/changes/ re-sends changes from this many seconds before the
+# client's watermark, covering writes that committed after it was issued
+SYNC_WATERMARK_OVERLAP = int(os.environ.get('SYNC_WATERMARK_OVERLAP', 5))
+# Tombstones of deleted rows are kept this long; older watermarks get a 410
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -114,6 +188,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = [
+    'api.backends.PooledModelBackend',
+]
+
+# Password hashing runs on a per-process pool of PASSWORD_HASHING_WORKERS
+# threads. Beyond PASSWORD_HASHING_QUEUE waiting hashes, register and login
+# answer 503 with Retry-After: PASSWORD_HASHING_RETRY_AFTER. Workers plus
+# queue must stay below the request threads of a gunicorn worker
+# (GUNICORN_THREADS in gunicorn.conf.py, default 8).
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE = int(os.environ.get('PASSWORD_HASHING_QUEUE', 4))
+PASSWORD_HASHING_RETRY_AFTER = int(os.environ.get('PASSWORD_HASHING_RETRY_AFTER', 1))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -137,19 +224,51 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Authenticate JWTs from their signed user_id claim without loading auth_user
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', 'True').lower() in ('true', '1', 'yes')
+
+# Seconds the is_active/staff state of a JWT user is cached by the stateless
+# authenticator (0 trusts the token alone and disables revocation checks)
+JWT_USER_CACHE_TTL = int(os.environ.get('JWT_USER_CACHE_TTL', 60))
+
+API_AUTHENTICATORS = {
+    'jwt': ('api.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+            else 'rest_framework_simplejwt.authentication.JWTAuthentication'),
+    'session': 'rest_framework.authentication.SessionAuthentication',
+    'token': 'rest_framework.authentication.TokenAuthentication',
+}
+
+# Authenticators DRF tries, in order; drop the ones no client uses
+API_ENABLED_AUTHENTICATORS = os.environ.get('API_AUTHENTICATORS', 'jwt,session,token').split(',')
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+    'DEFAULT_AUTHENTICATION_CLASSES': tuple(
+        API_AUTHENTICATORS[name.strip()] for name in API_ENABLED_AUTHENTICATORS
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Token buckets per user (client IP when anonymous): sign-in and
+    # registration, safe methods, and writes. An empty rate disables a bucket.
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.BucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': os.environ.get('THROTTLE_AUTH_RATE', '20/min'),
+        'read': os.environ.get('THROTTLE_READ_RATE', '600/min'),
+        'write': os.environ.get('THROTTLE_WRITE_RATE', '120/min'),
+    },
+    # Proxies in front of the app whose X-Forwarded-For entries are trusted
+    # for the client address of anonymous requests; 0 uses REMOTE_ADDR
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# Cache alias holding the throttle buckets; must be shared by all workers
+# (e.g. Redis or Memcached) for the budgets to hold across processes
+THROTTLE_CACHE = os.environ.get('THROTTLE_CACHE', 'default')
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Pave API',
     'DESCRIPTION': 'API for the Pave project',
@@ -171,6 +290,12 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_ALL_ORIGINS = False  # Set to True for development only
 
+# Conditional requests: browsers may send If-Match/If-None-Match and read ETag
+from corsheaders.defaults import default_headers
+
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag']
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -0,0 +1,18 @@
+import os
+
+from prometheus_client import multiprocess
+
+
+# Threaded workers: the password hashing pool can only shed load (503) when
+# several requests of a worker process wait on it at once. Keep
+# PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_QUEUE below ``threads`` so
+# other requests always find a free thread during a login burst.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+# With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to that
+# directory and /api/metrics/ aggregates them. Clear it before starting.
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)